@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Benchmark of the aggregate queries of a chart cube over the weekly artist
+charts of the members of a group, against aggregating the weekly chart
+entities, with the charts generated instead of fetched from last.fm.
+"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import os
+import sys
+import tempfile
+import time
+from xml.etree import ElementTree
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench_rolling_chart
+import lastfm.chartcube
+from bench_rolling_chart import BenchApi, weekly_artist_chart
+from lastfm import ChartCube, User
+
+MEMBERS = 20
+
+class MemberApi(BenchApi):
+    """the weekly artist charts differ between the users"""
+    def _fetch_data(self, params, sign = False, session = False, no_cache = False):
+        if params['method'] == 'user.getWeeklyArtistChart':
+            BenchApi.fetches += 1
+            return ElementTree.XML(weekly_artist_chart(
+                params['from'], params['to'], (params['user'], params['from'])))
+        return super(MemberApi, self)._fetch_data(params, sign, session, no_cache)
+
+def naive_top(members, start, end, limit):
+    totals = {}
+    for m in members:
+        for wc in m.weekly_chart_list:
+            if wc.start >= start and wc.end <= end:
+                for a in m.get_weekly_artist_chart(wc.start, wc.end).artists:
+                    totals[a.name] = totals.get(a.name, 0) + a.stats.playcount
+    ranked = sorted(totals.iteritems(), key = lambda nc: nc[1], reverse = True)
+    return ranked[:limit]
+
+if __name__ == '__main__':
+    if '--no-numpy' in sys.argv:
+        lastfm.chartcube.numpy = None
+    print "numpy:", lastfm.chartcube.numpy is not None
+    bench_rolling_chart.LATENCY = 0
+    api = MemberApi('benchmark', no_cache = True)
+    members = [User(api, name = "member %d" % i) for i in xrange(MEMBERS)]
+    path = os.path.join(tempfile.mkdtemp(), 'bench.cube')
+
+    cube = ChartCube(path)
+    t = time.time()
+    added = cube.fill(members, 'artist')
+    print "filled %d charts %8.3f s" % (added, time.time() - t)
+    wcl = members[0].weekly_chart_list
+    start, end = wcl[-52].start, wcl[-1].end
+    cube.close()
+
+    cube = ChartCube(path)
+    BenchApi.fetches = 0
+    print "refilled %d charts, %d fetches" % (cube.fill(members, 'artist'), BenchApi.fetches)
+    t = time.time()
+    for repeat in xrange(10):
+        top = cube.top(members, 'artist', start, end, limit = 10)
+    print "10 x yearly top 10 of %d members from the cube %8.3f s" % (MEMBERS, time.time() - t)
+    t = time.time()
+    contributions = cube.contributions(members, 'artist', top[0][0], start, end)
+    deltas = cube.deltas(members, 'artist', wcl[-13].start, end, limit = 10)
+    print "contributions and quarterly deltas %8.3f s" % (time.time() - t)
+    print "contributions add up:", sum(c for (m, c) in contributions) == top[0][1]
+
+    t = time.time()
+    naive = naive_top(members, start, end, 10)
+    print "yearly top 10 from the weekly chart entities %8.3f s" % (time.time() - t)
+    print "same top 10:", [c for (k, c) in naive] == [c for (k, c) in top]
+    cube.close()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Benchmark of the rolling charts of a user computed from the weekly charts
+and loaded from a chart store by a restarted process, with the weekly
+charts generated and served with a simulated latency instead of fetched
+from last.fm.
+"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_rolling_chart import BenchApi
+from lastfm import ChartStore, User
+
+def charts(path):
+    api = BenchApi('benchmark', no_cache = True)
+    api.set_chart_store(ChartStore(path))
+    user = User(api, name = "stored")
+    user.weekly_chart_list
+    BenchApi.fetches = 0
+    t = time.time()
+    mcl = user.monthly_chart_list
+    yearly = [user.get_yearly_artist_chart(mcl[i].start, mcl[i + 11].end)
+              for i in xrange(len(mcl) - 11)]
+    tops = [[(a.name, a.stats.playcount) for a in c.artists[:10]] for c in yearly]
+    elapsed = time.time() - t
+    everything = [[(a.name, a.stats.playcount, a.stats.rank) for a in c.artists] for c in yearly]
+    return elapsed, len(yearly), tops, hash(repr(everything))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        elapsed, n, tops, checksum = charts(sys.argv[1])
+        print "%d sliding yearly top 10s %8.3f s %4d fetches, checksum %d" % (
+            n, elapsed, BenchApi.fetches, checksum)
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'charts.db')
+        for run in ("computed", "loaded from the store"):
+            sys.stdout.write("%-24s" % run)
+            sys.stdout.flush()
+            subprocess.call([sys.executable, os.path.abspath(__file__), path])
+        print "store size: %d kB" % (os.path.getsize(path) // 1024)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Benchmark of the crawl of a synthetic random graph by the crawlable mixin,
+against the earlier crawler which kept the visited nodes in a list.
+"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lastfm.mixin import crawlable
+from lastfm.util import lazylist
+
+NODES = 20000
+DEGREE = 10
+
+random.seed(0)
+graph = [random.sample(xrange(NODES), DEGREE) for i in xrange(NODES)]
+
+def neighbours(api, hsh):
+    return [Node(i) for i in graph[hsh['id']]]
+
+@crawlable
+class Node(object):
+    _api = None
+    def __init__(self, id):
+        self.id = id
+    @staticmethod
+    def _get_all(seed):
+        return (seed, ['id'], neighbours)
+
+LATENCY = 0.005
+
+def slow_neighbours(api, hsh):
+    time.sleep(LATENCY)
+    return [SlowNode(i) for i in graph[hsh['id']]]
+
+@crawlable
+class SlowNode(Node):
+    """a node whose neighbours take a while to fetch, like over HTTP"""
+    @staticmethod
+    def _get_all(seed):
+        return (seed, ['id'], slow_neighbours)
+
+def list_get_all(seed):
+    hash_attrs, spider_func = ['id'], neighbours
+    @lazylist
+    def gen(lst):
+        seen = []
+        api = seed._api
+        def hash_dict(item):
+            return dict((a, getattr(item, a)) for a in hash_attrs)
+        seen.append(hash_dict(seed))
+        yield seed
+        for hsh in seen:
+            for n in spider_func(api, hsh):
+                if hash_dict(n) not in seen:
+                    seen.append(hash_dict(n))
+                    yield n
+    return gen()
+
+if __name__ == '__main__':
+    for name, get_all in (('list', list_get_all), ('set', Node.get_all)):
+        for count in (2000, 5000, 10000):
+            t = time.time()
+            crawled = get_all(Node(0))
+            crawled.exhaust(count - 1)
+            print "%-5s %5d nodes %10.3f s" % (name, len(crawled), time.time() - t)
+    for workers in (None, 4, 16):
+        t = time.time()
+        crawled = SlowNode.get_all(SlowNode(0), max_nodes = 2000, workers = workers)
+        crawled.exhaust()
+        print "%5s workers %5d nodes %10.3f s (%d ms latency)" % (
+            workers, len(crawled), time.time() - t, LATENCY * 1000)
+    #let the expansions still in flight finish before exiting
+    time.sleep(LATENCY * 2)
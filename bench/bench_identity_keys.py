@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Benchmark of the construction of cacheable entities, comparing the
+structured identity keys with the old string formatted hash keys.
+"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+from lastfm import Api, Album, Artist, User
+from lastfm.chart import WeeklyChart
+from lastfm.util import cache_key
+
+api = Api('bench', no_cache = True)
+user = User(api, name = 'bench')
+start = datetime(2009, 1, 4)
+end = start + timedelta(7)
+chart = WeeklyChart(subject = user, start = start, end = end)
+artists = [Artist(api, name = 'artist %d' % i) for i in xrange(1000)]
+
+def old_keys():
+    for a in artists:
+        hash((hash(chart), hash("%s%s" % ('album', hash(a.name.lower())))))
+    hash("%s%s%s%s" % (user.__class__.__name__, user.name, start, end))
+    hash("latlong%s%s" % (35.7, 139.7))
+
+def new_keys():
+    for a in artists:
+        (cache_key(chart), ('album', cache_key(a)))
+    (cache_key(user), start, end)
+    ('latlong', 35.7, 139.7)
+
+def construct():
+    for a in artists:
+        Album(api, subject = chart, name = 'album', artist = a)
+
+if __name__ == '__main__':
+    number = 100
+    for func in (old_keys, new_keys, construct):
+        t = timeit.timeit(func, number = number)
+        print "%-10s %8.2f us per entity" % (func.__name__, t * 1e6 / number / len(artists))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Benchmark of the iteration, slicing and random access of lazylists,
+against plain lists.
+"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lastfm.util._lazylist import LazyList
+
+SIZE = 50000
+data = range(SIZE)
+computed = LazyList(data)
+computed.exhaust()
+
+def list_iteration():
+    for x in data:
+        pass
+
+def fresh_lazylist_iteration():
+    for x in LazyList(data):
+        pass
+
+def computed_lazylist_iteration():
+    for x in computed:
+        pass
+
+def list_slice():
+    for x in data[:500]:
+        pass
+
+def fresh_lazylist_slice():
+    for x in LazyList(data)[:500]:
+        pass
+
+def computed_lazylist_slice():
+    for x in computed[:500]:
+        pass
+
+def computed_lazylist_random_access():
+    for i in xrange(0, SIZE, 7):
+        computed[i]
+
+if __name__ == '__main__':
+    number = 20
+    for func in (list_iteration, fresh_lazylist_iteration, computed_lazylist_iteration,
+                 list_slice, fresh_lazylist_slice, computed_lazylist_slice,
+                 computed_lazylist_random_access):
+        t = timeit.timeit(func, number = number)
+        print "%-32s %10.3f ms" % (func.__name__, t * 1e3 / number)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Benchmark of building the rolling charts of a user, with the weekly charts
+generated and served with a simulated latency instead of fetched from last.fm.
+"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import calendar
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from xml.etree import ElementTree
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lastfm.chart
+from lastfm import Api, User
+from lastfm.chart import Chart, RollingChart
+
+WEEKS = 104
+ARTISTS = 2000
+ROWS = 200
+LATENCY = 0.02
+
+START = calendar.timegm(datetime(2007, 1, 7, 12).timetuple())
+WEEK = 7 * 86400
+
+def weekly_chart_list():
+    charts = "".join('<chart from="%d" to="%d"/>' % (START + i * WEEK, START + (i + 1) * WEEK)
+                     for i in xrange(WEEKS))
+    return '<lfm><weeklychartlist>%s</weeklychartlist></lfm>' % charts
+
+def weekly_artist_chart(start, end, seed = None):
+    rnd = random.Random(start if seed is None else seed)
+    names = rnd.sample(xrange(ARTISTS), ROWS)
+    counts = sorted((rnd.randint(1, 100) for i in xrange(ROWS)), reverse = True)
+    rows = "".join('<artist rank="%d"><name>artist %d</name><mbid/><playcount>%d</playcount>'
+                   '<url>http://www.last.fm/music/artist+%d</url></artist>' % (r + 1, n, c, n)
+                   for (r, (n, c)) in enumerate(zip(names, counts)))
+    return '<lfm><weeklyartistchart from="%s" to="%s">%s</weeklyartistchart></lfm>' % (
+        start, end, rows)
+
+TAGS = 300
+
+def artist_top_tags(name):
+    rnd = random.Random(name)
+    tags = "".join('<tag><name>tag %d</name><url/></tag>' % t for t in rnd.sample(xrange(TAGS), 10))
+    return '<lfm><toptags>%s</toptags></lfm>' % tags
+
+def global_top_tags():
+    tags = "".join('<tag><name>tag %d</name><url/><count>%d</count></tag>' % (t, TAGS - t)
+                   for t in xrange(0, TAGS, 2))
+    return '<lfm><toptags>%s</toptags></lfm>' % tags
+
+class BenchApi(Api):
+    fetches = 0
+    def _fetch_data(self, params, sign = False, session = False, no_cache = False):
+        BenchApi.fetches += 1
+        method = params['method']
+        if method.endswith('getWeeklyChartList'):
+            xml = weekly_chart_list()
+        elif method.endswith('getWeeklyArtistChart'):
+            time.sleep(LATENCY)
+            xml = weekly_artist_chart(params['from'], params['to'])
+        elif method == 'artist.getTopTags':
+            time.sleep(LATENCY)
+            xml = artist_top_tags(params['artist'])
+        elif method == 'tag.getTopTags':
+            time.sleep(LATENCY)
+            xml = global_top_tags()
+        else:
+            raise ValueError(method)
+        return ElementTree.XML(xml)
+
+def build(name, workers):
+    RollingChart.FETCH_WORKERS = workers
+    user = User(BenchApi('benchmark', no_cache = True), name = name)
+    user.weekly_chart_list
+    BenchApi.fetches = 0
+    t = time.time()
+    charts = [user.get_yearly_artist_chart(), user.get_half_yearly_artist_chart(),
+              user.get_quaterly_artist_chart(), user.get_monthly_artist_chart()]
+    return time.time() - t, charts
+
+if __name__ == '__main__':
+    if '--no-numpy' in sys.argv:
+        lastfm.chart.numpy = None
+    print "numpy:", lastfm.chart.numpy is not None
+    results = {}
+    for workers in (1, 8):
+        elapsed, charts = build("bench%d" % workers, workers)
+        results[workers] = [[(a.name, a.stats.playcount) for a in c.artists] for c in charts]
+        print "%2d workers %8.3f s %4d fetches (%d ms latency)" % (
+            workers, elapsed, BenchApi.fetches, LATENCY * 1000)
+    print "same charts:", results[1] == results[8]
+    
+    user = User(BenchApi('benchmark', no_cache = True), name = "sweep")
+    BenchApi.fetches = 0
+    t = time.time()
+    monthly = list(user.monthly_artist_chart_list)
+    yearly = [user.get_yearly_artist_chart(mcl[i].start, mcl[i + 11].end)
+              for mcl in [user.monthly_chart_list] for i in xrange(len(mcl) - 11)]
+    print "%d monthly and %d sliding yearly charts %8.3f s %4d fetches" % (
+        len(monthly), len(yearly), time.time() - t, BenchApi.fetches)
+    t = time.time()
+    for repeat in xrange(10):
+        yearly = [user.get_yearly_artist_chart(mcl[i].start, mcl[i + 11].end).artists[:10]
+                  for mcl in [user.monthly_chart_list] for i in xrange(len(mcl) - 11)]
+    print "10 x %d sliding yearly top 10s from the partials %8.3f s" % (
+        len(yearly), time.time() - t)
+    
+    BenchApi.fetches = 0
+    t = time.time()
+    tag_charts = [user.get_weekly_tag_chart(wc.start, wc.end) for wc in user.weekly_chart_list[:13]]
+    print "%d weekly tag charts %8.3f s %4d fetches" % (
+        len(tag_charts), time.time() - t, BenchApi.fetches)
+    # another user with the same weekly charts, like a member of a group
+    other = User(user._api, name = "sweep again")
+    other.weekly_chart_list
+    BenchApi.fetches = 0
+    t = time.time()
+    tag_charts = [other.get_weekly_tag_chart(wc.start, wc.end) for wc in other.weekly_chart_list[:13]]
+    print "%d weekly tag charts of the same artists %8.3f s %4d fetches" % (
+        len(tag_charts), time.time() - t, BenchApi.fetches)
+    
+    charts = list(user.weekly_artist_chart_list)
+    t = time.time()
+    diffs = [[(e.item.name, e.movement, e.change) for e in d.entries] + 
+             [(e.item.name, e.movement, e.change) for e in d.dropped]
+             for d in Chart.diffs(charts)]
+    print "%d weekly artist chart diffs %8.3f s" % (len(diffs), time.time() - t)
+    t = time.time()
+    joined = []
+    for previous, chart in zip(charts[1:], charts):
+        before = dict((a.name, (a.stats.rank, a.stats.playcount)) for a in previous.artists)
+        after = dict((a.name, (a.stats.rank, a.stats.playcount)) for a in chart.artists)
+        joined.append([(a.name, before[a.name][0] - a.stats.rank if a.name in before else None,
+                        a.stats.playcount - before.get(a.name, (0, 0))[1]) for a in chart.artists] +
+                      [(a.name, None, -a.stats.playcount) for a in previous.artists
+                       if a.name not in after])
+    print "%d weekly artist chart diffs by joining the names %8.3f s" % (len(joined), time.time() - t)
+    print "same diffs:", diffs == joined
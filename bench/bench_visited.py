@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+Benchmark of the time and memory taken by the visited sets of the crawls,
+for the keys like those of the crawls of users.
+"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lastfm.util import BloomFilter, ScalableBloomFilter, SpillSet
+
+KEYS = 200000
+
+def set_memory(s):
+    return sys.getsizeof(s) + sum(sys.getsizeof(k) + sys.getsizeof(k[0]) for k in s)
+
+if __name__ == '__main__':
+    keys = [(u'user%08d' % i,) for i in xrange(KEYS)]
+    backends = (
+        ('set', set, set_memory),
+        ('bloom', lambda: BloomFilter(KEYS, 0.001), lambda s: s.memory),
+        ('scalable', lambda: ScalableBloomFilter(10000, 0.001), lambda s: s.memory),
+        ('spill', lambda: SpillSet(memory_limit = 10000), lambda s: set_memory(s._memory)),
+    )
+    for name, factory, memory in backends:
+        visited = factory()
+        t = time.time()
+        for k in keys:
+            if k not in visited:
+                visited.add(k)
+        elapsed = time.time() - t
+        print "%-9s %7d keys %8.3f s %10d bytes in memory" % (
+            name, len(visited), elapsed, memory(visited))
+        if hasattr(visited, 'close'):
+            visited.close()
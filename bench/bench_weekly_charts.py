@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Benchmark of loading the weekly artist charts of a user and reading their
+top 10s, counting the artists built, with the weekly charts generated
+instead of fetched from last.fm.
+"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import gc
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench_rolling_chart
+from bench_rolling_chart import BenchApi
+from lastfm import Artist, User
+
+if __name__ == '__main__':
+    bench_rolling_chart.WEEKS = 500
+    bench_rolling_chart.LATENCY = 0
+    user = User(BenchApi('benchmark', no_cache = True), name = "weekly")
+    user.weekly_chart_list
+    t = time.time()
+    charts = list(user.weekly_artist_chart_list)
+    loaded = time.time() - t
+    tops = [[(a.name, a.stats.playcount) for a in c.artists[:10]] for c in charts]
+    elapsed = time.time() - t
+    gc.collect()
+    artists = sum(1 for o in gc.get_objects() if isinstance(o, Artist))
+    print "%d weekly artist charts of %d rows: loaded in %.3f s, with top 10s in %.3f s" % (
+        len(charts), bench_rolling_chart.ROWS, loaded, elapsed)
+    print "artists alive: %d" % artists
+    
+    name = tops[0][0][0]
+    t = time.time()
+    scanned = [sum(a.stats.playcount for a in c.artists if a.name == name) for c in reversed(charts)]
+    print "series of one artist by scanning the charts %8.3f s" % (time.time() - t)
+    user = User(user._api, name = "matrix")
+    user.weekly_chart_list
+    t = time.time()
+    matrix = user.get_weekly_artist_matrix()
+    print "%r %8.3f s, %d counts (%d kB), dense %d kB" % (
+        matrix, time.time() - t, len(matrix.data),
+        (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) // 1024,
+        matrix.toarray().nbytes // 1024)
+    t = time.time()
+    series = matrix.series(name)
+    print "series of one artist from the matrix %8.3f s" % (time.time() - t)
+    print "same series:", series.tolist() == scanned
+    print "same matrix:", (matrix.toarray()[:, matrix.items.index(name)] == series).all()
@@ -18,6 +18,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from lastfm.album import Album
 from lastfm.api import Api
 from lastfm.artist import Artist
+from lastfm.chartcube import ChartCube
+from lastfm.chartstore import ChartStore
 from lastfm.error import LastfmError
 from lastfm.event import Event
 from lastfm.geo import Location, Country
@@ -31,6 +33,6 @@ from lastfm.user import User
 from lastfm.venue import Venue
 from lastfm.shout import Shout
 
-__all__ = ['LastfmError', 'Api', 'Album', 'Artist', 'Event',
+__all__ = ['LastfmError', 'Api', 'Album', 'Artist', 'ChartCube', 'ChartStore', 'Event',
            'Location', 'Country', 'Group', 'Playlist', 'Tag',
            'Tasteometer', 'Track', 'User', 'Venue', 'ObjectCache']
\ No newline at end of file
@@ -8,7 +8,7 @@ __package__ = "lastfm"
 
 from lastfm.base import LastfmBase
 from lastfm.mixin import mixin
-from lastfm.util import UTC, safe_int
+from lastfm.util import UTC, safe_int, cache_key
 from lastfm.decorators import cached_property, top_property
 
 @mixin("crawlable", "taggable", "searchable", 
@@ -211,12 +211,12 @@ class Album(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash("%s%s" % (kwds['name'], hash(kwds['artist'])))
+            return (kwds['name'], cache_key(kwds['artist']))
         except KeyError:
             raise InvalidParametersError("name and artist have to be provided for hashing")
         
     def __hash__(self):
-        return self.__class__._hash_func(name = self.name, artist = self.artist)
+        return hash(self.__class__._hash_func(name = self.name, artist = self.artist))
         
     def __eq__(self, other):
         if self.id and other.id:
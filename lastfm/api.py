@@ -77,6 +77,8 @@ class Api(object):
             self._cache = None
         else:
             self._cache = FileCache()
+        self._chart_store = None
+        self._artist_tags = None
         
         if debug is not None:
             if debug in Api.DEBUG_LEVELS:
@@ -167,6 +169,17 @@ class Api(object):
         """
         self._cache = cache
 
+    def set_chart_store(self, chart_store):
+        """
+        Set a store for keeping the rolling charts (monthly, quaterly, half
+        yearly and yearly) once they are computed, and for reusing them
+        instead of computing them again. Set to None to stop storing them.
+        
+        @param chart_store: the chart store
+        @type chart_store: L{ChartStore}
+        """
+        self._chart_store = chart_store
+
     def set_urllib(self, urllib):
         """
         Override the default urllib implementation.
@@ -669,15 +682,18 @@ class Api(object):
             return urllib.urlencode([(k, self._encode(parameters[k])) for k in keys if parameters[k] is not None])
 
     def _read_url_data(self, opener, url, data = None):
+        # reserve the next slot for starting a request, at least FETCH_INTERVAL
+        # after the previous one, and then wait for it outside the lock, so that
+        # the requests from multiple threads can be in flight together
         with _lock:
             now = datetime.utcnow().replace(tzinfo = UTC)
             delta = now - self._last_fetch_time
-            delta = delta.seconds + safe_float(delta.microseconds)/1000000
-            if delta < Api.FETCH_INTERVAL:
-                time.sleep(Api.FETCH_INTERVAL - delta)
-            url_data = opener.open(url, data).read()
-            self._last_fetch_time = datetime.utcnow().replace(tzinfo = UTC)
-        return url_data
+            delta = delta.days * 86400 + delta.seconds + safe_float(delta.microseconds)/1000000
+            wait = max(Api.FETCH_INTERVAL - delta, 0)
+            self._last_fetch_time = now + timedelta(seconds = wait)
+        if wait:
+            time.sleep(wait)
+        return opener.open(url, data).read()
 
     @Wormhole.entrance('lfm-api-raw-data')
     def _fetch_url(self, url, parameters = None, no_cache = False):
@@ -788,7 +804,7 @@ class Api(object):
     def __repr__(self):
         return "<lastfm.Api: %s>" % self._api_key
 
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 import time
 import urllib
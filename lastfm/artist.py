@@ -370,15 +370,15 @@ class Artist(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash(kwds['name'].lower())
+            return kwds['name'].lower()
         except KeyError:
             try:
-                return hash(args[1].lower())
+                return args[1].lower()
             except IndexError:
                 raise InvalidParametersError("name has to be provided for hashing")
 
     def __hash__(self):
-        return self.__class__._hash_func(name = self.name)
+        return hash(self.__class__._hash_func(name = self.name))
 
     def __eq__(self, other):
         if self.mbid and other.mbid:
@@ -5,10 +5,9 @@ __version__ = "0.2"
 __license__ = "GNU Lesser General Public License"
 __package__ = "lastfm"
 
-from functools import reduce
 from lastfm.base import LastfmBase
 from lastfm.mixin import mixin
-from lastfm.util import logging, UTC, safe_int, safe_float
+from lastfm.util import logging, UTC, safe_int, safe_float, cache_key
 from operator import xor
 
 @mixin("cacheable", "property_adder")
@@ -39,21 +38,16 @@ class Chart(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash("%s%s%s%s" % (
-                                      kwds['subject'].__class__.__name__,
-                                      kwds['subject'].name,
-                                      kwds['start'],
-                                      kwds['end']
-                               ))
+            return (cache_key(kwds['subject']), kwds['start'], kwds['end'])
         except KeyError:
             raise InvalidParametersError("subject, start and end have to be provided for hashing")
         
     def __hash__(self):
-        return self.__class__._hash_func(
+        return hash(self.__class__._hash_func(
             subject = self.subject,
             start = self.start,
             end = self.end
-        )
+        ))
     
     def __eq__(self, other):
         return self.subject == other.subject and \
@@ -79,8 +73,80 @@ class Chart(LastfmBase):
              self.end.strftime("%x"),
             )
 
+    def _diff_columns(self):
+        """
+        the columns (identity keys, items, ranks, counts) of the items of the
+        chart, read from the rows of a weekly chart without building its items
+        """
+        columns = self.__dict__.get('_item_columns')
+        if columns is None:
+            items = self.__dict__["_%ss" % self._chart_type]
+            if isinstance(items, _ChartRows):
+                keyed_counts = list(items.keyed_counts())
+                columns = ([key for (key, count) in keyed_counts], items,
+                           [row[3] if row[3] is not None else i + 1
+                            for (i, row) in enumerate(items.rows)],
+                           [count for (key, count) in keyed_counts])
+            else:
+                key_func = _item_keys[self._chart_type]
+                items = list(items)
+                columns = ([key_func(item) for item in items], items,
+                           [_item_rank(item, i) for (i, item) in enumerate(items)],
+                           [_item_count(item) for item in items])
+            self.__dict__['_item_columns'] = columns
+        return columns
+
+    def _item_index(self):
+        """the positions of the items in the chart by their identity keys"""
+        index = self.__dict__.get('_item_positions')
+        if index is None:
+            index = {}
+            for i, key in enumerate(self._diff_columns()[0]):
+                index.setdefault(key, i)
+            self.__dict__['_item_positions'] = index
+        return index
+
+    def diff(self, previous):
+        """
+        Compare the chart with a previous chart of the same type, like the
+        chart of the week before or of the year before. The items are
+        matched by their identities, in a single pass over the charts.
+        
+        @param previous:    the previous chart
+        @type previous:     L{Chart}
+        
+        @return:            the rank movements, the new entries, the dropouts
+                            and the changes in counts
+        @rtype:             L{ChartDiff}
+        """
+        return ChartDiff(self, previous)
+
+    @staticmethod
+    def diffs(charts):
+        """
+        Compare each of the charts with the one before it in time, going
+        through the charts (like a weekly_artist_chart_list) as they are
+        iterated. The charts may be in either chronological or reverse
+        chronological order, and each of them is indexed only once.
+        
+        @param charts:      the charts of the same type, in the order of time
+        @type charts:       iterable of L{Chart}
+        
+        @return:            the differences of the charts from the ones before them
+        @rtype:             iterator of L{ChartDiff}
+        """
+        last = None
+        for chart in charts:
+            if last is not None:
+                if last.start < chart.start:
+                    yield chart.diff(last)
+                else:
+                    yield last.diff(chart)
+            last = chart
+
 @mixin("property_adder")
 class AlbumChart(Chart):
+    _chart_type = "album"
     class Meta(object):
         properties = ["albums"]
         
@@ -90,6 +156,7 @@ class AlbumChart(Chart):
     
 @mixin("property_adder")
 class ArtistChart(Chart):
+    _chart_type = "artist"
     class Meta(object):
         properties = ["artists"]
         
@@ -99,6 +166,7 @@ class ArtistChart(Chart):
     
 @mixin("property_adder")
 class TrackChart(Chart):
+    _chart_type = "track"
     class Meta(object):
         properties = ["tracks"]
         
@@ -108,6 +176,7 @@ class TrackChart(Chart):
 
 @mixin("property_adder")
 class TagChart(Chart):
+    _chart_type = "tag"
     class Meta(object):
         properties = ["tags"]
         
@@ -115,6 +184,98 @@ class TagChart(Chart):
         super(TagChart, self).init(subject, start, end, stats)
         self._tags = tags
     
+class ChartDiff(object):
+    """
+    The differences of a chart from a previous chart of the same type, like
+    the chart of the week before or of the year before, item by item.
+
+    @ivar chart:        the chart
+    @ivar previous:     the previous chart
+    @ivar entries:      the entries for the items of the chart, in its order
+    @ivar dropped:      the entries for the items of the previous chart which
+                        are not in the chart, in the order of the previous chart
+    """
+    def __init__(self, chart, previous):
+        self.chart = chart
+        self.previous = previous
+        keys, items, ranks, counts = chart._diff_columns()
+        previous_index = previous._item_index()
+        previous_keys, previous_items, previous_ranks, previous_counts = previous._diff_columns()
+        self.entries = []
+        kept = set()
+        for i, key in enumerate(keys):
+            j = previous_index.get(key)
+            if j is None:
+                self.entries.append(ChartDiffEntry(items, i, ranks[i], None, counts[i], 0))
+            else:
+                kept.add(j)
+                self.entries.append(ChartDiffEntry(items, i, ranks[i], previous_ranks[j],
+                                                   counts[i], previous_counts[j]))
+        self.dropped = [ChartDiffEntry(previous_items, j, None, previous_ranks[j],
+                                       0, previous_counts[j])
+                        for j in xrange(len(previous_keys)) if j not in kept]
+
+    @property
+    def new(self):
+        """the entries for the items which are not in the previous chart"""
+        return [e for e in self.entries if e.previous_rank is None]
+
+    @property
+    def moves(self):
+        """the entries for the items which are in both the charts"""
+        return [e for e in self.entries if e.previous_rank is not None]
+
+    def __repr__(self):
+        return "<lastfm.ChartDiff: %r from %r>" % (self.chart, self.previous)
+
+class ChartDiffEntry(object):
+    """
+    An item in a L{ChartDiff}, with its ranks and counts in the chart and in
+    the previous chart. The rank is None for a chart the item is not in, and
+    the count is 0. The item is built only when it is accessed.
+    """
+    __slots__ = ['_items', '_index', 'rank', 'previous_rank', 'count', 'previous_count']
+    def __init__(self, items, index, rank, previous_rank, count, previous_count):
+        self._items = items
+        self._index = index
+        self.rank = rank
+        self.previous_rank = previous_rank
+        self.count = count
+        self.previous_count = previous_count
+
+    @property
+    def item(self):
+        """the item"""
+        return self._items[self._index]
+
+    @property
+    def movement(self):
+        """the number of ranks the item has gone up by, or None if it is not in both the charts"""
+        if self.rank is None or self.previous_rank is None:
+            return None
+        return self.previous_rank - self.rank
+
+    @property
+    def change(self):
+        """the change in the count of the item"""
+        return self.count - self.previous_count
+
+    def __repr__(self):
+        return "<lastfm.ChartDiffEntry: %r %s -> %s>" % (
+            self.item, self.previous_rank, self.rank)
+
+def _item_rank(item, i):
+    """the rank of the item at the index i of a chart"""
+    rank = item.stats.rank
+    return rank if rank is not None else i + 1
+
+def _item_count(item):
+    """the count of an item of a chart, the playcount, the tag count or the weight"""
+    stats = item.stats
+    for count in (stats.playcount, stats.count, stats.weight):
+        if count is not None:
+            return count
+
 class WeeklyChart(Chart):
     """A class for representing the weekly charts"""
     @staticmethod
@@ -129,12 +290,8 @@ class WeeklyChart(Chart):
     def _check_chart_params(params, subject, start = None, end = None):
         params = Chart._check_chart_params(params, subject, start, end)
         if start is not None and end is not None:
-            wcl = subject.weekly_chart_list
-            is_valid = False
-            for wc in wcl:
-                if wc.start == start and wc.end == end:
-                    is_valid = True
-            if not is_valid:
+            index = _ChartIndex.of(subject, 'weekly', subject.weekly_chart_list)
+            if index.position(start, end) is None:
                 raise InvalidParametersError("%s - %s chart dates are invalid" % (start, end))
         return params       
 
@@ -147,41 +304,37 @@ class WeeklyAlbumChart(AlbumChart, WeeklyChart):
                         start = datetime.utcfromtimestamp(safe_int(data.attrib['from'])).replace(tzinfo = UTC),
                         end = datetime.utcfromtimestamp(safe_int(data.attrib['to'])).replace(tzinfo = UTC),
                         )
+        rows = [(a.findtext('name'), a.findtext('mbid'), a.findtext('url'),
+                 safe_int(a.attrib['rank']), safe_int(a.findtext('playcount')),
+                 a.findtext('artist'), a.find('artist').attrib['mbid'])
+                for a in data.findall('album')]
+        def album(name, mbid, url, rank, playcount, artist, artist_mbid):
+            return Album(
+                         api,
+                         subject = w,
+                         name = name,
+                         mbid = mbid,
+                         artist = Artist(
+                                         api,
+                                         name = artist,
+                                         mbid = artist_mbid,
+                                         ),
+                         stats = Stats(
+                                       subject = name,
+                                       rank = rank,
+                                       playcount = playcount,
+                                       ),
+                         url = url,
+                         )
         return WeeklyAlbumChart(
             subject = subject,
             start = datetime.utcfromtimestamp(safe_int(data.attrib['from'])).replace(tzinfo = UTC),
             end = datetime.utcfromtimestamp(safe_int(data.attrib['to'])).replace(tzinfo = UTC),
             stats = Stats(
                 subject = subject,
-                playcount = reduce(
-                    lambda x,y:(
-                        x + safe_int(y.findtext('playcount'))
-                    ),
-                    data.findall('album'),
-                    0
-                )
+                playcount = sum(row[4] for row in rows)
             ),
-            albums = [
-                Album(
-                      api,
-                      subject = w,
-                      name = a.findtext('name'),
-                      mbid = a.findtext('mbid'),
-                      artist = Artist(
-                          api,
-                          subject = w,
-                          name = a.findtext('artist'),
-                          mbid = a.find('artist').attrib['mbid'],
-                          ),
-                      stats = Stats(
-                          subject = a.findtext('name'),
-                          rank = safe_int(a.attrib['rank']),
-                          playcount = safe_int(a.findtext('playcount')),
-                          ),
-                      url = a.findtext('url'),
-                      )
-                for a in data.findall('album')
-                ]
+            albums = _ChartRows(rows, Album, album, 'playcount')
             )
     
 class WeeklyArtistChart(ArtistChart, WeeklyChart):
@@ -193,37 +346,34 @@ class WeeklyArtistChart(ArtistChart, WeeklyChart):
                         start = datetime.utcfromtimestamp(safe_int(data.attrib['from'])).replace(tzinfo = UTC),
                         end = datetime.utcfromtimestamp(safe_int(data.attrib['to'])).replace(tzinfo = UTC),
                         )
-        count_attribute = data.find('artist').findtext('playcount') and 'playcount' or 'weight'
-        def get_count_attribute(artist):
-            return {count_attribute: safe_int(eval(artist.findtext(count_attribute)))}
-        def get_count_attribute_sum(artists):
-            return {count_attribute: reduce(
-                        lambda x, y:(x + safe_int(eval(y.findtext(count_attribute)))), artists, 0
-                    )}
-            
+        first = data.find('artist')
+        count_attribute = (first is None or first.findtext('playcount')) and 'playcount' or 'weight'
+        rows = [(a.findtext('name'), a.findtext('mbid'), a.findtext('url'),
+                 safe_int(a.attrib['rank']), safe_int(eval(a.findtext(count_attribute))),
+                 None, None)
+                for a in data.findall('artist')]
+        def artist(name, mbid, url, rank, count, *no_artist):
+            return Artist(
+                          api,
+                          subject = w,
+                          name = name,
+                          mbid = mbid,
+                          stats = Stats(
+                                        subject = name,
+                                        rank = rank,
+                                        **{count_attribute: count}
+                                        ),
+                          url = url,
+                          )
         return WeeklyArtistChart(
             subject = subject,
             start = datetime.utcfromtimestamp(safe_int(data.attrib['from'])).replace(tzinfo = UTC),
             end = datetime.utcfromtimestamp(safe_int(data.attrib['to'])).replace(tzinfo = UTC),
             stats = Stats(
                           subject = subject,
-                          **get_count_attribute_sum(data.findall('artist'))
+                          **{count_attribute: sum(row[4] for row in rows)}
                     ),
-            artists = [
-                      Artist(
-                            api,
-                            subject = w,
-                            name = a.findtext('name'),
-                            mbid = a.findtext('mbid'),
-                            stats = Stats(
-                                          subject = a.findtext('name'),
-                                          rank = safe_int(a.attrib['rank']),
-                                          **get_count_attribute(a)
-                                          ),
-                            url = a.findtext('url'),
-                            )
-                      for a in data.findall('artist')
-                      ]
+            artists = _ChartRows(rows, Artist, artist, count_attribute)
             )
     
 class WeeklyTrackChart(TrackChart, WeeklyChart):
@@ -235,40 +385,37 @@ class WeeklyTrackChart(TrackChart, WeeklyChart):
             start = datetime.utcfromtimestamp(safe_int(data.attrib['from'])).replace(tzinfo = UTC),
             end = datetime.utcfromtimestamp(safe_int(data.attrib['to'])).replace(tzinfo = UTC),
             )
+        rows = [(t.findtext('name'), t.findtext('mbid'), t.findtext('url'),
+                 safe_int(t.attrib['rank']), safe_int(t.findtext('playcount')),
+                 t.findtext('artist'), t.find('artist').attrib['mbid'])
+                for t in data.findall('track')]
+        def track(name, mbid, url, rank, playcount, artist, artist_mbid):
+            return Track(
+                         api,
+                         subject = w,
+                         name = name,
+                         mbid = mbid,
+                         artist = Artist(
+                                         api,
+                                         name = artist,
+                                         mbid = artist_mbid,
+                                         ),
+                         stats = Stats(
+                                       subject = name,
+                                       rank = rank,
+                                       playcount = playcount,
+                                       ),
+                         url = url,
+                         )
         return WeeklyTrackChart(
             subject = subject,
             start = datetime.utcfromtimestamp(safe_int(data.attrib['from'])).replace(tzinfo = UTC),
             end = datetime.utcfromtimestamp(safe_int(data.attrib['to'])).replace(tzinfo = UTC),
             stats = Stats(
                 subject = subject,
-                playcount = reduce(
-                                   lambda x,y:(
-                                               x + safe_int(y.findtext('playcount'))
-                                               ),
-                                   data.findall('track'),
-                                   0
-                )
+                playcount = sum(row[4] for row in rows)
             ),
-            tracks = [
-                      Track(
-                            api,
-                            subject = w,
-                            name = t.findtext('name'),
-                            mbid = t.findtext('mbid'),
-                            artist = Artist(
-                                            api,
-                                            name = t.findtext('artist'),
-                                            mbid = t.find('artist').attrib['mbid'],
-                                            ),
-                            stats = Stats(
-                                          subject = t.findtext('name'),
-                                          rank = safe_int(t.attrib['rank']),
-                                          playcount = safe_int(t.findtext('playcount')),
-                                          ),
-                            url = t.findtext('url'),
-                            )
-                      for t in data.findall('track')
-                     ]
+            tracks = _ChartRows(rows, Track, track, 'playcount')
            )
         
 class WeeklyTagChart(TagChart, WeeklyChart):
@@ -281,43 +428,43 @@ class WeeklyTagChart(TagChart, WeeklyChart):
                         end = end,
                         )
         max_tag_count = 3
-        global_top_tags = api.get_global_top_tags()
         from collections import defaultdict
 
         wac = subject.get_weekly_artist_chart(start, end)
         all_tags = defaultdict(lambda:0)
         tag_weights = defaultdict(lambda:0)
         total_playcount = 0
-        artist_count = 0
+        artists = []
         for artist in wac.artists:
-            artist_count += 1
+            artists.append(artist)
             total_playcount += artist.stats.playcount
-            tag_count = 0
-            for tag in artist.top_tags:
-                if tag not in global_top_tags: continue
-                if tag_count >= max_tag_count: break
-                all_tags[tag] += 1
-                tag_count += 1
-                
             artist_pp = artist.stats.playcount/safe_float(wac.stats.playcount)
             cumulative_pp = total_playcount/safe_float(wac.stats.playcount)
-            if (cumulative_pp > 0.75 or artist_pp < 0.01) and artist_count > 10:
+            if (cumulative_pp > 0.75 or artist_pp < 0.01) and len(artists) > 10:
                 break
+        artist_count = len(artists)
+        
+        artist_tags = _ArtistTags.of(api)
+        global_top_tags = artist_tags.global_top_tags()
+        top_tags = artist_tags.top_tags([artist.name for artist in artists])
+        def counted_tags(artist):
+            """the top tags of the artist which are global top tags, up to max_tag_count"""
+            return [tag for tag in top_tags[artist.name]
+                    if tag in global_top_tags][:max_tag_count]
+        
+        for artist in artists:
+            for tag in counted_tags(artist):
+                all_tags[tag] += 1
         
-        for artist in wac.artists[:artist_count]:
+        for artist in artists:
             artist_pp = artist.stats.playcount/safe_float(wac.stats.playcount)
             tf = 1/safe_float(max_tag_count)
-            tag_count = 0
             weighted_tfidfs = {}
-            for tag in artist.top_tags:
-                if tag not in global_top_tags: continue
-                if tag_count >= max_tag_count: break            
-                
+            for tag_count, tag in enumerate(counted_tags(artist)):
                 df = all_tags[tag]/safe_float(artist_count)
                 tfidf = tf/df
                 weighted_tfidf = safe_float(max_tag_count - tag_count)*tfidf
-                weighted_tfidfs[tag.name] = weighted_tfidf
-                tag_count += 1
+                weighted_tfidfs[tag] = weighted_tfidf
                 
             sum_weighted_tfidfs = sum(weighted_tfidfs.values())
             for tag in weighted_tfidfs:
@@ -357,131 +504,735 @@ class WeeklyTagChart(TagChart, WeeklyChart):
         wtc._artist_spectrum_analyzed = 100*total_playcount/safe_float(wac.stats.playcount)
         return wtc
 
+class _ArtistTags(object):
+    """
+    The names of the top tags of the artists and of the global top tags,
+    fetched for an L{Api} and shared by all the tag charts built with it.
+    The tags are kept for the cache timeout of the L{Api}, and only for the
+    L{MAX_ARTISTS} artists used most recently. The top tags of the artists
+    not kept are fetched concurrently.
+    """
+    WORKERS = 8
+    MAX_ARTISTS = 10000
+    """the number of the artists whose top tags are kept"""
+    def __init__(self, api):
+        self._api = api
+        self._tags = OrderedDict()
+        self._lock = Lock()
+        self._global_top_tags = None
+
+    @staticmethod
+    def of(api):
+        if api._artist_tags is None:
+            api._artist_tags = _ArtistTags(api)
+        return api._artist_tags
+
+    def _fresh(self, fetched):
+        return time.time() < fetched + self._api._cache_timeout
+
+    def global_top_tags(self):
+        """the set of the names of the global top tags"""
+        if self._global_top_tags is None or not self._fresh(self._global_top_tags[1]):
+            self._global_top_tags = (
+                frozenset(t.name for t in self._api.get_global_top_tags()), time.time())
+        return self._global_top_tags[0]
+
+    def top_tags(self, names):
+        """
+        Get the names of the top tags of the artists with the names, as a
+        dict by the artist names. The artists whose tags fail to be fetched
+        are given no tags, and are tried again the next time.
+        """
+        found = {}
+        with self._lock:
+            for name in set(names):
+                kept = self._tags.pop(name, None)
+                if kept is not None and self._fresh(kept[1]):
+                    found[name] = kept[0]
+                    self._tags[name] = kept
+        missing = list(set(n for n in names if n not in found))
+        def fetch(name):
+            params = {'method': 'artist.getTopTags', 'artist': name}
+            data = self._api._fetch_data(params).find('toptags')
+            return [t.findtext('name') for t in data.findall('tag')]
+        for i, tags in _fetch_concurrently(fetch, missing, self.WORKERS):
+            found[missing[i]] = tags
+            with self._lock:
+                self._tags[missing[i]] = (tags, time.time())
+                while len(self._tags) > self.MAX_ARTISTS:
+                    self._tags.popitem(last = False)
+        return dict((n, found.get(n, [])) for n in names)
+
+def _fetch_concurrently(func, args, workers):
+    """
+    Call the function on each of the arguments, with up to workers of the
+    calls made concurrently, and yield the results with the indices of their
+    arguments, in the order of the arguments, as they arrive. The calls which
+    fail with a L{LastfmError} are logged and skipped, and the other errors
+    are raised.
+    """
+    tasks = Queue()
+    results = Queue()
+    stopped = []
+    def work():
+        while not stopped:
+            try:
+                i, arg = tasks.get_nowait()
+            except Empty:
+                return
+            try:
+                results.put((i, func(arg), None))
+            except Exception, e:
+                results.put((i, None, e))
+    
+    for i, arg in enumerate(args):
+        tasks.put((i, arg))
+    for i in xrange(min(workers, len(args))):
+        thread = Thread(target = work)
+        thread.setDaemon(True)
+        thread.start()
+    
+    received = {}
+    try:
+        for i in xrange(len(args)):
+            while i not in received:
+                j, result, error = results.get()
+                received[j] = (result, error)
+            result, error = received.pop(i)
+            if isinstance(error, LastfmError):
+                logging.log_silenced_exceptions(error)
+            elif error is not None:
+                raise error
+            else:
+                yield (i, result)
+    finally:
+        stopped.append(True)
+
 class RollingChart(Chart):
     """Base class for the rolling charts classes"""
+    FETCH_WORKERS = 8
+    """the number of weekly charts fetched concurrently for a rolling chart"""
+    
+    @staticmethod
+    def _weekly_charts(subject, chart_type, wcl, workers):
+        """
+        Fetch the weekly charts of the chart type for the weekly chart list,
+        with up to workers of them fetched concurrently, and yield them with
+        their indices in the list, in the order of the list, as they arrive.
+        The charts which fail to be fetched with a L{LastfmError} are logged
+        and skipped.
+        """
+        get_chart = getattr(subject, "get_weekly_%s_chart" % chart_type)
+        return _fetch_concurrently(lambda wc: get_chart(wc.start, wc.end), wcl, workers)
+
     @classmethod
     def _check_chart_params(cls, params, subject, start = None, end = None):
         duration = cls._period['duration']
         params = Chart._check_chart_params(params, subject, start, end)
         if start is not None and end is not None:
-            mcl = MonthlyChart.get_chart_list(subject)
-            is_valid = False
-            for i in xrange(len(mcl)-(duration-1)):
-                if mcl[i].start == start and mcl[i+(duration-1)].end == end:
-                    is_valid = True
-            if not is_valid:
+            mcl = subject.monthly_chart_list
+            i = _ChartIndex.of(subject, 'monthly', mcl).position_from(start)
+            if i is None or i + duration > len(mcl) or mcl[i + duration - 1].end != end:
                 raise InvalidParametersError("%s - %s chart dates are invalid" % (start, end))
         return params
 
+    @classmethod
+    def get_chart_list(cls, subject):
+        """
+        Get the list of the charts of the period of this class available for
+        the subject, made of the consecutive months of its weekly charts.
+        
+        The lists for all the periods are computed together, once for a
+        weekly chart list of the subject, and are computed again only when
+        the weekly chart list changes.
+        
+        @param subject:  the subject of the charts
+        @type subject:   L{User} or L{Group} or L{Tag} or L{Artist}
+        
+        @return:         the charts of the period
+        @rtype:          L{tuple} of L{RollingChart}
+        """
+        return RollingChart._chart_lists(subject)[cls._period['name']]
+
+    @staticmethod
+    def _chart_lists(subject):
+        wcl = subject.weekly_chart_list
+        cached = subject._rolling_chart_lists
+        if cached is not None and cached[0] is wcl:
+            return cached[1]
+        months = set()
+        for l in wcl:
+            months.add(l.start.replace(day=1, hour=12, minute=0, second=0))
+        months = list(months)
+        months.sort()
+        months[0] = wcl[0].start.replace(hour=12, minute=0, second=0)
+        months.append(wcl[-1].end.replace(hour=12, minute=0, second=0))
+        
+        lists = {}
+        for period_class in (MonthlyChart, QuaterlyChart, HalfYearlyChart, YearlyChart):
+            duration = period_class._period['duration']
+            lists[period_class._period['name']] = tuple(
+                period_class(
+                    subject = subject,
+                    start = months[i],
+                    end = months[i + duration]
+                )
+                for i in xrange(len(months) - duration))
+        subject._rolling_chart_lists = (wcl, lists)
+        return lists
+
+    @staticmethod
+    def _item_attributes(item):
+        """
+        the attributes of an item of a weekly chart to copy to a rolling
+        chart, with the artist of the item as a dict of its own attributes
+        """
+        meta = item.Meta
+        attributes = meta.properties + getattr(meta, 'fillable_properties', [])
+        attributes = dict((a, item.__dict__['_%s' % a]) for a in attributes
+                          if a not in ('stats', 'subject') and item.__dict__.get('_%s' % a) is not None)
+        if isinstance(attributes.get('artist'), Artist):
+            attributes['artist'] = RollingChart._item_attributes(attributes['artist'])
+        return attributes
+
     @classmethod
     def create_from_data(cls, subject, key_func,
-                         start = None, end = None):
+                         start = None, end = None, normalize = False):
         chart_type = cls.mro()[0]._chart_type
-        period = cls.mro()[3]._period
+        period_class = cls.mro()[3]
+        period = period_class._period
         globals()["%slyChart" % period['name'].title().replace(' ','')]._check_chart_params({}, subject, start, end)
-        mcl = MonthlyChart.get_chart_list(subject)
+        mcl = subject.monthly_chart_list
         if start is None and end is None:
             start = mcl[-period['duration']].start
             end = mcl[-1].end
-        wcl = subject.weekly_chart_list
-        period_wcl = [wc for wc in wcl
-            if start < wc.start < end or start < wc.end < end]
-        period_wacl = []
-        for wc in period_wcl:
-            try:
-                period_wacl.append(
-                    getattr(subject, "get_weekly_%s_chart" % chart_type)(wc.start, wc.end))
-            except LastfmError as ex:
-                logging.log_silenced_exceptions(ex)
-        stats_dict = period_wacl[0].__dict__["_%ss" % chart_type][0].stats.__dict__
-        count_attribute = [k for k in stats_dict.keys()
-                           if stats_dict[k] is not None and k not in ['_rank', '_subject']][0]
-        items = {}
-        for wac in period_wacl:
-            for item in wac.__dict__["_%ss" % chart_type]:
-                key = key_func(item)
-                mw_start = max(wac.start, start)
-                mw_end = min(wac.end, end)
-                count = item.stats.__dict__[count_attribute] * (mw_end - mw_start).days / 7.0
-                if key in items:
-                    items[key].stats.__dict__[count_attribute] += count
-                else:
-                    items[key] = item
-                    items[key].stats.__dict__[count_attribute] = count
-        items = items.values()
-        items = [a for a in items if a.stats.__dict__[count_attribute] >= 1]
-        items.sort(key = lambda a: a.stats.__dict__[count_attribute], reverse=True)
-        for i,item in enumerate(items):
-            item.stats._rank = i + 1
-            item.stats.__dict__[count_attribute] = safe_int(item.stats.__dict__[count_attribute])
-        return globals()[
+        chart_class = globals()[
             "%sly%sChart" % (
                 period['name'].title().replace(' ',''),
                 chart_type.capitalize()
-            )](
+            )]
+        store = subject._api._chart_store
+        stored = store is not None and store.get(subject, chart_class, start, end) or None
+        if stored is not None:
+            count_attribute, total, length = stored.count_attribute, stored.total, len(stored)
+            item_at = stored.item
+        else:
+            partials = _WeeklyPartials.of(subject, chart_type, key_func)
+            ids, counts = partials.ranked(start, end)
+            count_attribute = partials.count_attribute
+            total = safe_int(sum(counts))
+            length = len(ids)
+            def item_at(i):
+                item_class, attributes = partials.attributes(ids[i])
+                return (item_class, attributes, safe_int(counts[i]))
+            if store is not None and partials.covers(start, end):
+                store.put(subject, chart_class, start, end, count_attribute, total,
+                          [item_at(i) for i in xrange(length)])
+        w = period_class(subject = subject, start = start, end = end)
+        def entry(i):
+            item_class, attributes, count = item_at(i)
+            if 'artist' in attributes:
+                attributes = dict(attributes, artist = Artist(subject._api, **attributes['artist']))
+            if normalize:
+                count = count / float(total)
+            stats = Stats(subject = attributes.get('name'), rank = i + 1,
+                          **{count_attribute[1:]: count})
+            return item_class(subject._api, subject = w, stats = stats, **attributes)
+        return chart_class(
             subject = subject,
             start = start,
             end = end,
             stats = Stats(
                 subject = subject,
-                **{count_attribute[1:]: sum(a.stats.__dict__[count_attribute] for a in items)}
+                **{count_attribute[1:]: total}
             ),
-            **{"%ss" % chart_type: items}
+            **{"%ss" % chart_type: _ChartEntries(length, entry)}
         )
 
+class _ChartIndex(object):
+    """
+    An index of a list of charts, sorted by their dates, for looking up the
+    charts by their date ranges in constant time and the charts overlapping
+    a date range by bisecting.
+    """
+    def __init__(self, charts):
+        self.charts = charts
+        self._positions = dict(((c.start, c.end), i) for (i, c) in enumerate(charts))
+        self._positions_from = dict((c.start, i) for (i, c) in enumerate(charts))
+        self._starts = [c.start for c in charts]
+        self._ends = [c.end for c in charts]
+
+    @staticmethod
+    def of(subject, name, charts):
+        """
+        Get the index named name for the subject, created afresh if the list
+        of charts has changed since it was created.
+        """
+        indices = subject._chart_indices
+        if indices is None:
+            indices = subject._chart_indices = {}
+        index = indices.get(name)
+        if index is None or index.charts is not charts:
+            index = indices[name] = _ChartIndex(charts)
+        return index
+
+    def position(self, start, end):
+        """the position of the chart from start to end, or None"""
+        return self._positions.get((start, end))
+
+    def position_from(self, start):
+        """the position of the chart starting at start, or None"""
+        return self._positions_from.get(start)
+
+    def overlapping(self, start, end):
+        """the positions of the charts starting or ending strictly between start and end"""
+        lo = bisect_right(self._ends, start)
+        hi = bisect_left(self._starts, end)
+        charts = self.charts
+        return [i for i in xrange(lo, hi)
+                if start < charts[i].start < end or start < charts[i].end < end]
+
+    def within(self, start, end):
+        """the positions of the charts falling wholly between start and end, the ends included"""
+        return range(bisect_left(self._starts, start), bisect_right(self._ends, end))
+
+class _ChartEntries(object):
+    """
+    A read-only sequence of the entries of a chart, each of which is built
+    by calling the factory with its index, only when it is accessed for the
+    first time.
+    
+    It stands in for the list of the entries the charts used to have, and
+    supports the operations of a list which do not change it: indexing,
+    slicing (which gives a list), iteration, C{len}, C{in}, C{index},
+    C{count}, comparing for equality with a list and concatenating with a
+    list (which gives a list). Convert it with C{list} for the others.
+    """
+    def __init__(self, length, factory):
+        self._entries = [None] * length
+        self._factory = factory
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self._entries)))]
+        entry = self._entries[index]
+        if entry is None:
+            entry = self._entries[index] = self._factory(index % len(self._entries))
+        return entry
+
+    def __iter__(self):
+        for i in xrange(len(self._entries)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, _ChartEntries)):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __add__(self, other):
+        if not isinstance(other, (list, _ChartEntries)):
+            return NotImplemented
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return other + list(self)
+
+    def index(self, value):
+        for i, entry in enumerate(self):
+            if entry == value:
+                return i
+        raise ValueError("%r is not in the chart entries" % (value,))
+
+    def count(self, value):
+        return sum(1 for entry in self if entry == value)
+
+    def __repr__(self):
+        return "<lastfm.ChartEntries: %d entries>" % len(self._entries)
+
+class _ChartRows(_ChartEntries):
+    """
+    The entries of a weekly chart, kept as the rows of the chart: tuples of
+    (name, mbid, url, rank, count, artist name, artist mbid), with the last
+    two None for the artists. An entry is built from its row by the build
+    function only when it is accessed, and the keys, the counts and the
+    attributes of the items are read from the rows, without building the
+    entries.
+    """
+    def __init__(self, rows, item_class, build, count_attribute):
+        super(_ChartRows, self).__init__(len(rows), lambda i: build(*rows[i]))
+        self.rows = rows
+        self.item_class = item_class
+        self.count_attribute = count_attribute
+
+    def attributes(self, i):
+        """the class and the attributes of the item at the index i, as given by RollingChart._item_attributes"""
+        name, mbid, url, rank, count, artist, artist_mbid = self.rows[i]
+        attributes = dict((a, v) for (a, v) in (('name', name), ('mbid', mbid), ('url', url))
+                          if v is not None)
+        if artist is not None:
+            attributes['artist'] = dict((a, v) for (a, v) in (('name', artist), ('mbid', artist_mbid))
+                                        if v is not None)
+        return (self.item_class, attributes)
+
+    def keyed_counts(self):
+        """iterate over the keys of the items (as given by _item_keys) and their counts"""
+        for row in self.rows:
+            if row[5] is None:
+                yield (row[0], row[4])
+            else:
+                yield ("::".join((row[0], row[5])), row[4])
+
+class _WeeklyPartials(object):
+    """
+    The partial aggregates of the weekly charts of a chart type for a
+    subject, from which the rolling charts are built. The keys of the items
+    are interned to integer ids, and the counts of the items of each weekly
+    chart are kept as a pair of columns (ids and counts) once the chart is
+    fetched, along with the item from the earliest week for each id. The
+    columns are NumPy arrays if NumPy is installed, and the aggregation is
+    vectorized then.
+    
+    The totals of the last window of the whole weeks aggregated are kept,
+    so that the next window overlapping it is aggregated by adding and
+    subtracting only the weeks which differ between them. The weeks at the
+    edges of a window, which overlap it partially, are prorated by the
+    number of days they overlap for.
+    """
+    def __init__(self, subject, chart_type, key_func):
+        self._subject = subject
+        self._chart_type = chart_type
+        self._key_func = key_func
+        self._wcl = subject.weekly_chart_list
+        self._partials = {}
+        self._ids = {}
+        self._items = []
+        self._keys = []
+        self._lock = Lock()
+        self._full = (0, 0)
+        self._totals = self._zeros(0)
+        self.count_attribute = None
+
+    @staticmethod
+    def of(subject, chart_type, key_func):
+        """
+        Get the partials for the subject and the chart type, created afresh
+        if the weekly chart list of the subject has changed.
+        """
+        registry = subject._weekly_partials
+        if registry is None:
+            registry = subject._weekly_partials = {}
+        partials = registry.get(chart_type)
+        if partials is None or partials._wcl is not subject.weekly_chart_list:
+            partials = registry[chart_type] = _WeeklyPartials(subject, chart_type, key_func)
+        return partials
+
+    @staticmethod
+    def _zeros(length):
+        if numpy is not None:
+            return numpy.zeros(length)
+        return {}
+
+    @staticmethod
+    def _columns(counts):
+        """the columns (ids, counts) of a dict of counts by ids"""
+        if numpy is not None:
+            return (numpy.fromiter(counts.iterkeys(), numpy.int64, len(counts)),
+                    numpy.fromiter(counts.itervalues(), numpy.float64, len(counts)))
+        return (array('l', counts.iterkeys()), array('d', counts.itervalues()))
+
+    def item(self, id):
+        i, entries, j = self._items[id]
+        return entries[j]
+
+    def attributes(self, id):
+        """the class and the attributes of the item of the id, to copy to a rolling chart"""
+        i, entries, j = self._items[id]
+        if isinstance(entries, _ChartRows):
+            return entries.attributes(j)
+        item = entries[j]
+        return (item.__class__, RollingChart._item_attributes(item))
+
+    def _intern(self, key, i, entries, j):
+        """the id of the key, of the item at the index j of the entries of the week i"""
+        id = self._ids.get(key)
+        if id is None:
+            id = self._ids[key] = len(self._items)
+            self._keys.append(key)
+            self._items.append((i, entries, j))
+        elif self._items[id][0] > i:
+            self._items[id] = (i, entries, j)
+        return id
+
+    def _fill(self, indices):
+        """fetch the weekly charts at the indices, whose partials are not there yet"""
+        missing = [i for i in indices if i not in self._partials]
+        wcl = [self._wcl[i] for i in missing]
+        for j, chart in RollingChart._weekly_charts(
+                self._subject, self._chart_type, wcl, RollingChart.FETCH_WORKERS):
+            i = missing[j]
+            chart_items = chart.__dict__["_%ss" % self._chart_type]
+            counts = {}
+            if isinstance(chart_items, _ChartRows):
+                # the items are not built, but for those ranked in the end
+                if self.count_attribute is None and chart_items.rows:
+                    self.count_attribute = "_%s" % chart_items.count_attribute
+                for j, (key, count) in enumerate(chart_items.keyed_counts()):
+                    id = self._intern(key, i, chart_items, j)
+                    counts[id] = counts.get(id, 0) + count
+            else:
+                if self.count_attribute is None and chart_items:
+                    stats_dict = chart_items[0].stats.__dict__
+                    self.count_attribute = [k for k in stats_dict.keys()
+                                            if stats_dict[k] is not None and k not in ['_rank', '_subject']][0]
+                for j, item in enumerate(chart_items):
+                    id = self._intern(self._key_func(item), i, chart_items, j)
+                    counts[id] = counts.get(id, 0) + item.stats.__dict__[self.count_attribute]
+            self._partials[i] = self._columns(counts)
+        if numpy is not None and len(self._totals) < len(self._items):
+            self._totals = numpy.concatenate(
+                (self._totals, numpy.zeros(len(self._items) - len(self._totals))))
+        # the weeks which failed to be fetched before, but are fetched now,
+        # inside the window totalled
+        a, b = self._full
+        for i in missing:
+            if a <= i < b and i in self._partials:
+                self._add(i, 1)
+
+    def _add(self, i, sign):
+        if i not in self._partials:
+            return
+        ids, counts = self._partials[i]
+        if numpy is not None:
+            self._totals[ids] += sign * counts
+            return
+        totals = self._totals
+        for id, count in izip(ids, counts):
+            total = totals.get(id, 0) + sign * count
+            if total:
+                totals[id] = total
+            else:
+                del totals[id]
+
+    def _move(self, f0, f1):
+        """move the window of the whole weeks totalled to the weeks [f0, f1)"""
+        a, b = self._full
+        if max(a, f0) < min(b, f1) and abs(f0 - a) + abs(f1 - b) < f1 - f0:
+            for i in xrange(a, f0):
+                self._add(i, -1)
+            for i in xrange(f0, a):
+                self._add(i, 1)
+            for i in xrange(b, f1):
+                self._add(i, 1)
+            for i in xrange(f1, b):
+                self._add(i, -1)
+        else:
+            self._totals = self._zeros(len(self._items))
+            for i in xrange(f0, f1):
+                self._add(i, 1)
+        self._full = (f0, f1)
+
+    def weeks(self, indices):
+        """
+        Get the columns (ids, counts) of the weekly charts at the indices,
+        fetching those not fetched yet, with empty columns for the charts
+        which fail to be fetched, and the keys of the items by their ids.
+        """
+        with self._lock:
+            self._fill(indices)
+            empty = self._columns({})
+            return ([self._partials.get(i, empty) for i in indices], list(self._keys))
+
+    def covers(self, start, end):
+        """
+        Whether the weekly charts falling between start and end have all
+        been fetched, and none of them ends after the last weekly chart of
+        the subject, so that a rolling chart built from them is final.
+        """
+        if not self._wcl or end > self._wcl[-1].end:
+            return False
+        with self._lock:
+            return all(i in self._partials for i in
+                       _ChartIndex.of(self._subject, 'weekly', self._wcl).overlapping(start, end))
+
+    def ranked(self, start, end):
+        """
+        Get the ids of the items and their whole counts, for the weekly
+        charts falling between start and end, in the descending order of
+        the counts (and in the order of interning for the equal counts),
+        leaving out the items with counts less than one.
+        """
+        with self._lock:
+            weeks = []
+            for i in _ChartIndex.of(self._subject, 'weekly', self._wcl).overlapping(start, end):
+                wc = self._wcl[i]
+                weeks.append((i, (min(wc.end, end) - max(wc.start, start)).days))
+            self._fill([i for (i, days) in weeks])
+            whole = [i for (i, days) in weeks if days == 7]
+            if whole:
+                self._move(whole[0], whole[-1] + 1)
+            else:
+                self._move(0, 0)
+            edges = [(self._partials[i], days) for (i, days) in weeks
+                     if days != 7 and i in self._partials]
+            # the counts are summed in sevenths of weeks, and divided at the
+            # end, so that they do not depend on the order of summing
+            if numpy is not None:
+                counts = 7 * self._totals
+                for (ids, week_counts), days in edges:
+                    counts[ids] += days * week_counts
+                ids = numpy.flatnonzero(counts >= 7)
+                counts = numpy.floor_divide(counts[ids], 7)
+                order = numpy.argsort(-counts, kind = 'mergesort')
+                return (ids[order], counts[order])
+            counts = dict((id, 7 * total) for (id, total) in self._totals.iteritems())
+            for (ids, week_counts), days in edges:
+                for id, count in izip(ids, week_counts):
+                    counts[id] = counts.get(id, 0) + days * count
+            ranked = sorted((id, count // 7) for (id, count) in counts.iteritems() if count >= 7)
+            ranked.sort(key = lambda ic: ic[1], reverse = True)
+            return ([id for (id, count) in ranked], [count for (id, count) in ranked])
+
+class WeeklyChartMatrix(object):
+    """
+    The counts of the items of the weekly charts of a subject, as a matrix
+    with a row for each week and a column for each item counted in any of
+    the weeks. The matrix is kept sparse, in the compressed sparse row form,
+    as most of the items are counted in only a few of the weeks, and is
+    made dense on demand. It is built from the same partial aggregates of
+    the weekly charts as the rolling charts, so the weekly charts are
+    fetched concurrently, and only once for both. NumPy is needed for it.
+    
+    @ivar weeks:    the weekly charts of the rows, in the chronological order
+    @ivar items:    the keys of the items of the columns, as in the rolling charts
+    @ivar data:     the counts in the matrix which are not zero, row by row
+    @ivar indices:  the column indices of the counts
+    @ivar indptr:   the offsets of the rows in data and indices, and the number of the counts
+    """
+    def __init__(self, weeks, items, data, indices, indptr):
+        self.weeks = weeks
+        self.items = items
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self._columns = None
+
+    @classmethod
+    def create_from_data(cls, subject, chart_type, start = None, end = None):
+        if numpy is None:
+            raise ImportError("NumPy is needed for the weekly chart matrices")
+        Chart._check_chart_params({}, subject, start, end)
+        wcl = subject.weekly_chart_list
+        if start is None:
+            positions = range(len(wcl))
+        else:
+            positions = _ChartIndex.of(subject, 'weekly', wcl).within(start, end)
+        partials = _WeeklyPartials.of(subject, chart_type, _item_keys[chart_type])
+        columns, keys = partials.weeks(positions)
+        lengths = [len(column[0]) for column in columns]
+        ids = numpy.concatenate([numpy.zeros(0, numpy.int64)] + [column[0] for column in columns])
+        counts = numpy.concatenate([numpy.zeros(0)] + [column[1] for column in columns])
+        items = numpy.unique(ids)
+        indices = numpy.searchsorted(items, ids)
+        order = numpy.lexsort((indices, numpy.repeat(numpy.arange(len(columns)), lengths)))
+        return cls([wcl[i] for i in positions], [keys[id] for id in items.tolist()],
+                   counts[order], indices[order],
+                   numpy.concatenate(([0], numpy.cumsum(lengths))).astype(numpy.int64))
+
+    @property
+    def shape(self):
+        """the number of the weeks and the number of the items"""
+        return (len(self.weeks), len(self.items))
+
+    def _rows(self):
+        """the row indices of the counts"""
+        return numpy.repeat(numpy.arange(len(self.weeks)), numpy.diff(self.indptr))
+
+    def toarray(self):
+        """
+        Get the matrix as a dense NumPy array.
+        
+        @rtype:     C{numpy.ndarray}
+        """
+        array = numpy.zeros(self.shape)
+        array[self._rows(), self.indices] = self.data
+        return array
+
+    def tocsr(self):
+        """
+        Get the matrix as a SciPy sparse matrix, if SciPy is installed.
+        
+        @rtype:     C{scipy.sparse.csr_matrix}
+        """
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.data, self.indices, self.indptr), shape = self.shape)
+
+    def series(self, key):
+        """
+        Get the counts of an item in each of the weeks.
+        
+        @param key:     the key of the item, as in L{items}
+        @type key:      L{str}
+        
+        @return:        the counts, which are all zero for an item not in the matrix
+        @rtype:         C{numpy.ndarray}
+        """
+        if self._columns is None:
+            self._columns = dict((k, i) for (i, k) in enumerate(self.items))
+        series = numpy.zeros(len(self.weeks))
+        column = self._columns.get(key)
+        if column is not None:
+            selected = self.indices == column
+            series[self._rows()[selected]] = self.data[selected]
+        return series
+
+    def __repr__(self):
+        return "<lastfm.WeeklyChartMatrix: %d weeks x %d items>" % self.shape
+
+# the functions computing the keys identifying the items of the charts
+# across the weeks, by the chart types
+_item_keys = {
+    'album': lambda album: "::".join((album.name, album.artist.name)),
+    'artist': lambda artist: artist.name,
+    'track': lambda track: "::".join((track.name, track.artist.name)),
+    'tag': lambda tag: tag.name,
+    }
+
 class RollingAlbumChart(AlbumChart):
     @classmethod
     def create_from_data(cls, subject, start = None, end = None):
-        key_func = lambda album: "::".join((album.name, album.artist.name))
         return super(cls.mro()[3], cls).create_from_data(
-            subject, key_func, start, end)
+            subject, _item_keys['album'], start, end)
 
 class RollingArtistChart(ArtistChart):
     @classmethod
     def create_from_data(cls, subject, start = None, end = None):
-        key_func = lambda artist: artist.name
         return super(cls.mro()[3], cls).create_from_data(
-            subject, key_func, start, end)
+            subject, _item_keys['artist'], start, end)
 
 class RollingTrackChart(TrackChart):
     @classmethod
     def create_from_data(cls, subject, start = None, end = None):
-        key_func = lambda track: "::".join((track.name, track.artist.name))
         return super(cls.mro()[3], cls).create_from_data(
-            subject, key_func, start, end)
+            subject, _item_keys['track'], start, end)
 
 class RollingTagChart(TagChart):
     @classmethod
     def create_from_data(cls, subject, start = None, end = None):
-        key_func = lambda tag: tag.name
-        chart = super(cls.mro()[3], cls).create_from_data(
-            subject, key_func, start, end)
-        count_sum = sum(t.stats.count for t in chart.tags)
-        for t in chart.tags:
-            t.stats.__dict__['_count'] /= count_sum
-        return chart 
+        return super(cls.mro()[3], cls).create_from_data(
+            subject, _item_keys['tag'], start, end, normalize = True)
 
 class MonthlyChart(RollingChart):
     """A class for representing the monthly charts"""
     _period = {'name': 'month', 'duration': 1}
-    
-    @staticmethod
-    def get_chart_list(subject):
-        wcl = subject.weekly_chart_list
-        months = set()
-        for l in wcl:
-            months.add(l.start.replace(day=1, hour=12, minute=0, second=0))
-        months = list(months)
-        months.sort()
-        months[0] = wcl[0].start.replace(hour=12, minute=0, second=0)
-        months.append(wcl[-1].end.replace(hour=12, minute=0, second=0))
-
-        return [MonthlyChart(
-                    subject=subject,
-                    start=months[i],
-                    end=months[i+1]
-                )
-               for i in xrange(len(months)-1)]
         
 class MonthlyAlbumChart(RollingAlbumChart, MonthlyChart):
     """A class for representing the monthly album charts"""
@@ -560,7 +1311,8 @@ class YearlyTagChart(RollingTagChart, YearlyChart):
     _chart_type = "tag"
 
 __all__ = [
-    'WeeklyChart',
+    'ChartDiff', 'ChartDiffEntry',
+    'WeeklyChart', 'WeeklyChartMatrix',
     'WeeklyAlbumChart', 'WeeklyArtistChart', 'WeeklyTrackChart', 'WeeklyTagChart',
     'MonthlyChart',
     'MonthlyAlbumChart', 'MonthlyArtistChart', 'MonthlyTrackChart', 'MonthlyTagChart', 
@@ -571,8 +1323,15 @@ __all__ = [
     'YearlyChart',
     'YearlyAlbumChart', 'YearlyArtistChart', 'YearlyTrackChart', 'YearlyTagChart'
 ]
+from array import array
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
 from datetime import datetime
+from itertools import izip
+from Queue import Queue, Empty
+from threading import Lock, Thread
 import calendar
+import time
 
 from lastfm.album import Album
 from lastfm.artist import Artist
@@ -580,3 +1339,8 @@ from lastfm.error import InvalidParametersError, LastfmError
 from lastfm.stats import Stats
 from lastfm.track import Track
 from lastfm.tag import Tag
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
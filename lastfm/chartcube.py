@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+"""Module for storing the weekly charts of many subjects for aggregate queries"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+__package__ = "lastfm"
+
+class ChartCube(object):
+    """
+    A store of the counts of the items of the weekly charts of many subjects
+    (the members of a group, for example), by the subject, the week and the
+    item, in an SQLite database. The subjects and the items are numbered in
+    separate tables, so that each count is stored as a row of integers, and
+    the queries are answered from the stored counts alone, without fetching
+    the charts again or creating any entities. The counts selected for a
+    query are summed by SQLite, and the sums are ranked and compared with
+    NumPy if it is installed.
+
+    The items are identified by their keys, as in the rolling charts: the
+    names of the artists and the tags, and the names of the albums and the
+    tracks joined with those of their artists by '::'. A date range given to
+    a query covers the weeks falling entirely in it, and all the weeks if it
+    is not given.
+
+    >>> cube = ChartCube('group.cube')
+    >>> cube.fill(group.members, 'artist')
+    >>> cube.top(group.members, 'artist', start, end, limit = 10)
+    """
+    BATCH_SIZE = 500
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread = False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS subjects (id INTEGER PRIMARY KEY, key TEXT UNIQUE);
+            CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, chart_type TEXT, key TEXT,
+                                              UNIQUE (chart_type, key));
+            CREATE TABLE IF NOT EXISTS weeks (subject INTEGER, chart_type TEXT,
+                                              week_start INTEGER, week_end INTEGER,
+                                              PRIMARY KEY (subject, chart_type, week_start));
+            CREATE TABLE IF NOT EXISTS counts (subject INTEGER, chart_type TEXT,
+                                               week_start INTEGER, week_end INTEGER,
+                                               item INTEGER, count REAL);
+            CREATE INDEX IF NOT EXISTS counts_week ON counts (chart_type, subject, week_start,
+                                                               week_end, item, count);
+        """)
+        self._db.commit()
+        self._subject_ids = {}
+        self._item_ids = {}
+
+    def _subject_id(self, subject, create = True):
+        k = encode_key(cache_key(subject))
+        id = self._subject_ids.get(k)
+        if id is None:
+            row = self._db.execute("SELECT id FROM subjects WHERE key = ?", (k,)).fetchone()
+            if row is not None:
+                id = row[0]
+            elif create:
+                id = self._db.execute("INSERT INTO subjects (key) VALUES (?)", (k,)).lastrowid
+            else:
+                return None
+            self._subject_ids[k] = id
+        return id
+
+    def _item_id(self, chart_type, key, create = True):
+        id = self._item_ids.get((chart_type, key))
+        if id is None:
+            row = self._db.execute("SELECT id FROM items WHERE chart_type = ? AND key = ?",
+                                   (chart_type, key)).fetchone()
+            if row is not None:
+                id = row[0]
+            elif create:
+                id = self._db.execute("INSERT INTO items (chart_type, key) VALUES (?, ?)",
+                                      (chart_type, key)).lastrowid
+            else:
+                return None
+            self._item_ids[(chart_type, key)] = id
+        return id
+
+    def _keys(self, ids):
+        keys = {}
+        ids = list(ids)
+        for i in xrange(0, len(ids), self.BATCH_SIZE):
+            batch = ids[i:i + self.BATCH_SIZE]
+            keys.update(self._db.execute(
+                "SELECT id, key FROM items WHERE id IN (%s)" % ", ".join("?" * len(batch)),
+                batch))
+        return keys
+
+    def add(self, subject, chart_type, chart):
+        """
+        Add the counts of a weekly chart of the subject to the cube, in place
+        of those of the same week added before. The counts are committed when
+        the cube is filled or closed.
+
+        @param subject:         the subject of the chart
+        @type subject:          L{User}, L{Group}, L{Artist} or L{Tag}
+        @param chart_type:      the type of the chart ('album', 'artist', 'track' or 'tag')
+        @type chart_type:       L{str}
+        @param chart:           the weekly chart
+        @type chart:            L{WeeklyChart}
+        """
+        s = self._subject_id(subject)
+        start = calendar.timegm(chart.start.timetuple())
+        end = calendar.timegm(chart.end.timetuple())
+        entries = getattr(chart, "%ss" % chart_type)
+        if isinstance(entries, _ChartRows):
+            keyed_counts = entries.keyed_counts()
+        else:
+            key_func = _item_keys[chart_type]
+            keyed_counts = ((key_func(item), _item_count(item)) for item in entries)
+        counts = {}
+        for key, count in keyed_counts:
+            id = self._item_id(chart_type, key)
+            counts[id] = counts.get(id, 0) + count
+        self._db.execute("DELETE FROM counts WHERE chart_type = ? AND subject = ? AND week_start = ?",
+                         (chart_type, s, start))
+        self._db.executemany("INSERT INTO counts VALUES (?, ?, ?, ?, ?, ?)",
+                             ((s, chart_type, start, end, id, count)
+                              for (id, count) in counts.iteritems()))
+        self._db.execute("INSERT OR REPLACE INTO weeks VALUES (?, ?, ?, ?)",
+                         (s, chart_type, start, end))
+
+    def fill(self, subjects, chart_type, start = None, end = None):
+        """
+        Fetch and add the weekly charts of the subjects, for the weeks in
+        their weekly chart lists between start and end which are not in the
+        cube yet. The charts of each subject are fetched concurrently, and
+        committed once they are all added. The charts which fail to be
+        fetched are logged and skipped, and are fetched the next time.
+
+        @param subjects:        the subjects of the charts
+        @type subjects:         iterable of L{User}, L{Group}, L{Artist} or L{Tag}
+        @param chart_type:      the type of the charts ('album', 'artist', 'track' or 'tag')
+        @type chart_type:       L{str}
+        @param start:           the start of the date range (optional)
+        @type start:            C{datetime.datetime}
+        @param end:             the end of the date range (optional)
+        @type end:              C{datetime.datetime}
+
+        @return:                the number of the charts added
+        @rtype:                 L{int}
+        """
+        added = 0
+        for subject in subjects:
+            s = self._subject_id(subject)
+            have = set(row[0] for row in self._db.execute(
+                "SELECT week_start FROM weeks WHERE subject = ? AND chart_type = ?", (s, chart_type)))
+            wcl = [wc for wc in subject.weekly_chart_list
+                   if (start is None or wc.start >= start) and (end is None or wc.end <= end)
+                   and calendar.timegm(wc.start.timetuple()) not in have]
+            for i, chart in RollingChart._weekly_charts(subject, chart_type, wcl,
+                                                        RollingChart.FETCH_WORKERS):
+                self.add(subject, chart_type, chart)
+                added += 1
+            self._db.commit()
+        return added
+
+    def _sums(self, subjects, chart_type, start, end, item = None, length = 0):
+        """
+        the sums of the counts of the subjects in the weeks between start and
+        end, by the item ids, or for a single item, by the positions of the
+        subjects. The counts are summed by SQLite for each batch of the
+        subjects, and the sums of the batches added up.
+        """
+        index = {}
+        for i, subject in enumerate(subjects):
+            s = self._subject_id(subject, create = False)
+            if s is not None:
+                index.setdefault(s, i)
+        where = ["chart_type = ?"]
+        params = [chart_type]
+        if start is not None:
+            where.append("week_start >= ?")
+            params.append(calendar.timegm(start.timetuple()))
+        if end is not None:
+            where.append("week_end <= ?")
+            params.append(calendar.timegm(end.timetuple()))
+        if item is not None:
+            where.append("item = ?")
+            params.append(item)
+        by = item is None and "item" or "subject"
+        keys, counts = [], []
+        ids = index.keys()
+        for i in xrange(0, len(ids), self.BATCH_SIZE):
+            batch = ids[i:i + self.BATCH_SIZE]
+            for key, count in self._db.execute(
+                    "SELECT %s, SUM(count) FROM counts WHERE %s AND subject IN (%s) GROUP BY %s" % (
+                        by, " AND ".join(where), ", ".join("?" * len(batch)), by),
+                    params + batch):
+                keys.append(key)
+                counts.append(count)
+        if item is not None:
+            keys = [index[s] for s in keys]
+        if numpy is not None:
+            if not keys:
+                return numpy.zeros(length)
+            return numpy.bincount(keys, counts, length)
+        sums = {}
+        for key, count in izip(keys, counts):
+            sums[key] = sums.get(key, 0) + count
+        return sums
+
+    @staticmethod
+    def _ranked(values, order_by):
+        """
+        the keys and values of the nonzero values, in the descending order
+        of order_by (and the ascending order of the keys for the equal ones)
+        """
+        if numpy is not None:
+            keys = numpy.flatnonzero(values)
+            keys = keys[numpy.argsort(-order_by[keys], kind = 'mergesort')]
+            return [(k, values[k]) for k in keys.tolist()]
+        ranked = sorted((k, v) for (k, v) in values.iteritems() if v)
+        ranked.sort(key = lambda kv: order_by.get(kv[0], 0), reverse = True)
+        return ranked
+
+    def top(self, subjects, chart_type, start = None, end = None, limit = 10):
+        """
+        Get the top items of the subjects taken together, by the sums of
+        their counts in the weeks between start and end.
+
+        @return:                the keys of the items and their counts
+        @rtype:                 L{list} of (L{str}, count) tuples
+        """
+        totals = self._sums(subjects, chart_type, start, end)
+        ranked = self._ranked(totals, totals)[:limit]
+        keys = self._keys(id for (id, count) in ranked)
+        return [(keys[id], _value(chart_type, count)) for (id, count) in ranked]
+
+    def contributions(self, subjects, chart_type, key, start = None, end = None):
+        """
+        Get the counts of an item for each of the subjects in the weeks
+        between start and end, for the subjects which have counted it.
+
+        @return:                the subjects and their counts, highest first
+        @rtype:                 L{list} of (subject, count) tuples
+        """
+        subjects = list(subjects)
+        item = self._item_id(chart_type, key, create = False)
+        if item is None:
+            return []
+        totals = self._sums(subjects, chart_type, start, end, item, len(subjects))
+        return [(subjects[i], _value(chart_type, count))
+                for (i, count) in self._ranked(totals, totals)]
+
+    def deltas(self, subjects, chart_type, start, end, limit = None):
+        """
+        Compare the counts of the items of the subjects taken together in
+        the weeks between start and end, with those in the period of the same
+        length just before it.
+
+        @return:                the keys of the items with their counts and
+                                the changes from the previous period, for the
+                                items counted in either period, the largest
+                                rises first
+        @rtype:                 L{list} of (L{str}, count, change) tuples
+        """
+        subjects = list(subjects)
+        current = self._sums(subjects, chart_type, start, end)
+        previous = self._sums(subjects, chart_type, start - (end - start), start)
+        if numpy is not None:
+            length = max(len(current), len(previous))
+            current = numpy.concatenate((current, numpy.zeros(length - len(current))))
+            previous = numpy.concatenate((previous, numpy.zeros(length - len(previous))))
+            changes = current - previous
+            changed = numpy.flatnonzero((current != 0) | (previous != 0))
+            order = changed[numpy.argsort(-changes[changed], kind = 'mergesort')]
+            ranked = [(id, current[id], changes[id]) for id in order.tolist()]
+        else:
+            ranked = sorted((id, current.get(id, 0), current.get(id, 0) - previous.get(id, 0))
+                            for id in set(current) | set(previous))
+            ranked.sort(key = lambda icd: icd[2], reverse = True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        keys = self._keys(id for (id, count, change) in ranked)
+        return [(keys[id], _value(chart_type, count), _value(chart_type, change))
+                for (id, count, change) in ranked]
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+def _value(chart_type, count):
+    if chart_type == 'tag':
+        return float(count)
+    return int(count)
+
+from itertools import izip
+import calendar
+import sqlite3
+
+from lastfm.chart import RollingChart, _ChartRows, _item_count, _item_keys
+from lastfm.util import cache_key
+from lastfm.util.visitedset import encode_key
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""Module for keeping the computed rolling charts on the disk"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+__package__ = "lastfm"
+
+class ChartStore(object):
+    """
+    A store of the computed rolling charts (the monthly, quaterly, half
+    yearly and yearly charts) in an SQLite database, keyed by the subject,
+    the class of the chart (which gives its period and type) and its date
+    range. Set on an L{Api} with L{Api.set_chart_store}, it keeps the
+    rolling charts as they are computed, and they are loaded from it the
+    next time instead of being computed again, even by another process.
+
+    Only the charts whose weekly charts have all been fetched, and which do
+    not extend beyond the last weekly chart of the subject, are kept, as
+    they do not change any more.
+
+    Each chart is kept in a compact binary form: the attributes of its
+    items and their counts as columns, marshalled and compressed. Loading a
+    chart reads only its total count and its length, and its items are read
+    and decoded when the first of them is accessed.
+
+    >>> api.set_chart_store(ChartStore('charts.db'))
+    """
+    FORMAT = 1
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread = False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS charts (subject TEXT, chart TEXT,
+                                               range_start INTEGER, range_end INTEGER,
+                                               count_attribute TEXT, total INTEGER,
+                                               length INTEGER, data BLOB,
+                                               PRIMARY KEY (subject, chart, range_start, range_end));
+        """)
+        self._db.commit()
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(subject, chart_class, start, end):
+        return (encode_key(cache_key(subject)), chart_class.__name__,
+                calendar.timegm(start.timetuple()), calendar.timegm(end.timetuple()))
+
+    def get(self, subject, chart_class, start, end):
+        """
+        Get the stored chart of the subject, of the class and the date range.
+
+        @return:    the stored chart, or None if it is not stored
+        @rtype:     L{_StoredChart}
+        """
+        with self._lock:
+            row = self._db.execute("""
+                SELECT rowid, count_attribute, total, length FROM charts
+                WHERE subject = ? AND chart = ? AND range_start = ? AND range_end = ?""",
+                self._key(subject, chart_class, start, end)).fetchone()
+        if row is None:
+            return None
+        rowid, count_attribute, total, length = row
+        return _StoredChart(self, rowid, count_attribute, total, length)
+
+    def _data(self, rowid):
+        with self._lock:
+            data = self._db.execute("SELECT data FROM charts WHERE rowid = ?", (rowid,)).fetchone()[0]
+        data = marshal.loads(zlib.decompress(data))
+        if data[0] != self.FORMAT:
+            raise LastfmError("the chart store %s is of an unknown format" % self.path)
+        return data[1:]
+
+    def put(self, subject, chart_class, start, end, count_attribute, total, items):
+        """
+        Store a chart of the subject, of the class and the date range.
+
+        @param count_attribute:     the attribute of the stats of the items
+                                    holding their counts
+        @param total:               the total count of the chart
+        @param items:               the items of the chart as (class,
+                                    attributes, count) tuples, in the order
+                                    of the chart, with the artist of an
+                                    item as a dict of its attributes
+        """
+        classes = []
+        rows = []
+        counts = []
+        for item_class, attributes, count in items:
+            row = {}
+            for name, value in attributes.iteritems():
+                if name == 'artist':
+                    for n, v in value.iteritems():
+                        if _plain(v):
+                            row['artist.%s' % n] = v
+                elif _plain(value):
+                    row[name] = value
+            classes.append(item_class.__name__)
+            rows.append(row)
+            counts.append(count)
+        names = set(name for row in rows for name in row)
+        columns = dict((name, [row.get(name) for row in rows]) for name in names)
+        data = zlib.compress(marshal.dumps((self.FORMAT, classes, columns, counts)))
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO charts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             self._key(subject, chart_class, start, end) +
+                             (count_attribute, total, len(rows), buffer(data)))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class _StoredChart(object):
+    """
+    A chart loaded from a L{ChartStore}, whose items are read from the store
+    when the first of them is needed.
+    """
+    def __init__(self, store, rowid, count_attribute, total, length):
+        self._store = store
+        self._rowid = rowid
+        self._data = None
+        self.count_attribute = count_attribute
+        self.total = total
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def item(self, i):
+        """
+        the item at the index i as a (class, attributes, count) tuple, with
+        the artist of the item as a dict of its attributes
+        """
+        if self._data is None:
+            self._data = self._store._data(self._rowid)
+        classes, columns, counts = self._data
+        attributes = {}
+        artist = {}
+        for name, column in columns.iteritems():
+            value = column[i]
+            if value is None:
+                continue
+            if name.startswith('artist.'):
+                artist[name[7:]] = value
+            else:
+                attributes[name] = value
+        if artist:
+            attributes['artist'] = artist
+        return (_item_classes[classes[i]], attributes, counts[i])
+
+def _plain(value):
+    """whether the value is of a type kept as it is by a chart store"""
+    if isinstance(value, dict):
+        return all(isinstance(v, basestring) for v in value.itervalues())
+    return isinstance(value, (basestring, int, long, float, bool))
+
+import calendar
+import marshal
+import sqlite3
+import zlib
+from threading import Lock
+
+from lastfm.album import Album
+from lastfm.artist import Artist
+from lastfm.error import LastfmError
+from lastfm.tag import Tag
+from lastfm.track import Track
+from lastfm.util import cache_key
+from lastfm.util.visitedset import encode_key
+
+_item_classes = dict((cls.__name__, cls) for cls in (Album, Artist, Tag, Track))
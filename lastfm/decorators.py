@@ -30,22 +30,44 @@ def top_property(list_property_name):
         return property(fget = wrapper, doc = func.__doc__)
     return decorator
 
-def cached_property(func):
+def cached_property(func = None, view = False):
     """
     A decorator to cache the atrribute of the object. When called for the first time,
     the value of the attribute is retrived and saved in an instance variable. Later
     calls return the copy of the cached value, so that the original cached value
     cannot be modified.
     
+    If C{view} is True, the cached value is returned without copying. A L{list}
+    value is stored as a L{tuple}, so that it cannot be modified. Other values
+    (like a L{lazylist}) are returned as they are. Use it as
+    C{@cached_property(view = True)}.
+    
     @param func:  the getter function of the attribute
     @type func:   C{function}
+    @param view:  flag to return an immutable view of the cached value instead
+                  of a copy (optional)
+    @type view:   L{bool}
     
     @return:      a property that wraps the getter function of the attribute
     @rtype:       L{property}
     """
+    if func is None:
+        return lambda f: cached_property(f, view)
+
     func_name = func.func_code.co_name
     attribute_name = "_%s" % func_name
 
+    if view:
+        def wrapper(ob):
+            cache_attribute = getattr(ob, attribute_name, None)
+            if cache_attribute is None:
+                cache_attribute = func(ob)
+                if isinstance(cache_attribute, list):
+                    cache_attribute = tuple(cache_attribute)
+                setattr(ob, attribute_name, cache_attribute)
+            return cache_attribute
+        return property(fget = wrapper, doc = func.__doc__)
+
     def wrapper(ob):
         cache_attribute = getattr(ob, attribute_name, None)
         if cache_attribute is None:
@@ -111,10 +133,15 @@ def depaginate(func, *args, **kwargs):
     @return:        a function that wraps the original function and returns
                     a L{lazylist} of all search results (all pages)
     @rtype:         C{function}
+    
+    @note: The pages are fetched as the lazylist is consumed. Call 
+           C{read_ahead(count)} on the lazylist to fetch them in background instead.
+           Use C{stream()} or C{chunks(size)} of the lazylist to iterate over
+           all the results once, without keeping them in memory. Only the
+           depaginated lazylists support this.
     """
-    from lastfm.util import lazylist
-    @lazylist
-    def generator(lst):
+    from lastfm.util._lazylist import LazyList
+    def generator():
         gen = func(*args, **kwargs)
         total_pages = gen.next()
         for e in gen:
@@ -128,7 +155,7 @@ def depaginate(func, *args, **kwargs):
                 continue
             for e in gen:
                 yield e
-    return generator()
+    return LazyList(generator(), source = generator)
     
 @decorator
 def async_callback(func, *args, **kwargs):
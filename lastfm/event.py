@@ -205,12 +205,12 @@ class Event(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash(kwds['id'])
+            return kwds['id']
         except KeyError:
             raise InvalidParametersError("id has to be provided for hashing")
 
     def __hash__(self):
-        return Event._hash_func(id = self.id)
+        return hash(Event._hash_func(id = self.id))
 
     def __eq__(self, other):
         return self.id == other.id
@@ -236,20 +236,20 @@ class Location(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash("latlong%s%s" % (kwds['latitude'], kwds['longitude']))
+            return ('latlong', kwds['latitude'], kwds['longitude'])
         except KeyError:
             try:
-                return hash("name%s" % kwds['city'])
+                return ('city', kwds['city'])
             except KeyError:
                 raise InvalidParametersError("either latitude and longitude or city has to be provided for hashing")
 
     def __hash__(self):
         if not self.city:
-            return self.__class__._hash_func(
+            return hash(self.__class__._hash_func(
                                            latitude = self.latitude,
-                                           longitude = self.longitude)
+                                           longitude = self.longitude))
         else:
-            return self.__class__._hash_func(name = self.city)
+            return hash(self.__class__._hash_func(city = self.city))
 
     def __eq__(self, other):
         return self.latitude == other.latitude and self.longitude == other.longitude
@@ -597,12 +597,12 @@ class Country(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash(kwds['name'].lower())
+            return kwds['name'].lower()
         except KeyError:
             raise InvalidParametersError("name has to be provided for hashing")
 
     def __hash__(self):
-        return self.__class__._hash_func(name = self.name)
+        return hash(self.__class__._hash_func(name = self.name))
 
     def __eq__(self, other):
         return self.name.lower() == other.name.lower()
@@ -70,12 +70,12 @@ class Group(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash(kwds['name'])
+            return kwds['name']
         except KeyError:
             raise InvalidParametersError("name has to be provided for hashing")
 
     def __hash__(self):
-        return self.__class__._hash_func(name = self.name)
+        return hash(self.__class__._hash_func(name = self.name))
 
     def __eq__(self, other):
         return self.name == other.name
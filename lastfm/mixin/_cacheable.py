@@ -5,13 +5,7 @@ __version__ = "0.2"
 __license__ = "GNU Lesser General Public License"
 __package__ = "lastfm.mixin"
 
-try:
-    from threading import Lock
-except ImportError:
-    from dummy_threading import Lock
-from lastfm.util import ObjectCache
-
-_lock = Lock()
+from lastfm.util import ObjectCache, cache_key
 
 def cacheable(cls):
     @classmethod
@@ -25,17 +19,27 @@ def cacheable(cls):
         if 'bypass_registry' in kwds:
             del kwds['bypass_registry']
             inst = object.__new__(cls)
+            # not registered, but identified like the registered instances
+            inst._cache_key = cls._hash_func(*args, **kwds)
             inst.init(*args, **kwds)
             return inst
 
-        key = cls._hash_func(*args, **kwds)
+        identity = cls._hash_func(*args, **kwds)
         if subject is not None:
-            key = (hash(subject), key)
-            
-        with _lock:
-            inst, already_registered = ObjectCache.register(object.__new__(cls), key)
-            if not already_registered:
-                inst.init(*args, **kwds)
+            key = (cache_key(subject), identity)
+        else:
+            key = identity
+
+        inst = ObjectCache.get(cls.__name__, key)
+        if inst is not None:
+            return inst
+        # initialize outside the registry locks and publish the instance only
+        # after it is fully initialized. If another thread has registered an
+        # instance for the same key meanwhile, that one wins.
+        inst = object.__new__(cls)
+        inst._cache_key = identity
+        inst.init(*args, **kwds)
+        inst, already_registered = ObjectCache.register(inst, key)
         return inst
         
     @staticmethod
@@ -10,11 +10,11 @@ from lastfm.decorators import cached_property
 
 def chartable(*chart_types):
     def wrapper(cls):
-        @cached_property
+        @cached_property(view = True)
         def weekly_chart_list(self):
             """
             a list of available weekly charts for this group
-            @rtype: L{list} of L{WeeklyChart}
+            @rtype: L{tuple} of L{WeeklyChart}
             """
             from lastfm.chart import WeeklyChart
             params = self._default_params(
@@ -25,8 +25,12 @@ def chartable(*chart_types):
                     for c in data.findall('chart')
                     ]
     
-        @cached_property
+        @property
         def monthly_chart_list(self):
+            """
+            a list of available monthly charts for this group
+            @rtype: L{tuple} of L{MonthlyChart}
+            """
             from lastfm.chart import MonthlyChart
             return MonthlyChart.get_chart_list(self)
         
@@ -69,7 +73,7 @@ def chartable(*chart_types):
             """
             return self.get_weekly_album_chart()
     
-        @cached_property
+        @cached_property(view = True)
         def weekly_album_chart_list(self):
             """
             a list of all album charts for this group in reverse-chronological
@@ -87,6 +91,23 @@ def chartable(*chart_types):
                         logging.log_silenced_exceptions(ex)
             return gen()
         
+        def get_weekly_album_matrix(self, start = None, end = None):
+            """
+            Get the counts of the albums for each week in the weekly chart
+            list, for a given date range, as a week x album matrix. If no date
+            range is supplied, all the weeks are included.
+            
+            @param start:    the date from which the weeks should be included (optional)
+            @type start:     C{datetime.datetime}
+            @param end:      the date up to which the weeks should be included (optional)
+            @type end:       C{datetime.datetime}
+            
+            @return:         the counts of the albums by the weeks
+            @rtype:          L{WeeklyChartMatrix}
+            """
+            from lastfm.chart import WeeklyChartMatrix
+            return WeeklyChartMatrix.create_from_data(self, 'album', start, end)
+        
         def get_monthly_album_chart(self, start = None, end = None):
             from lastfm.chart import MonthlyAlbumChart
             return MonthlyAlbumChart.create_from_data(self, start, end)
@@ -95,7 +116,7 @@ def chartable(*chart_types):
         def recent_monthly_album_chart(self):
             return self.get_monthly_album_chart()
         
-        @cached_property
+        @cached_property(view = True)
         def monthly_album_chart_list(self):
             mcl = list(self.monthly_chart_list)
             mcl.reverse()
@@ -165,7 +186,7 @@ def chartable(*chart_types):
             """
             return self.get_weekly_artist_chart()
     
-        @cached_property
+        @cached_property(view = True)
         def weekly_artist_chart_list(self):
             """
             a list of all artist charts for this group in reverse-chronological
@@ -183,6 +204,23 @@ def chartable(*chart_types):
                         logging.log_silenced_exceptions(ex)
             return gen()
         
+        def get_weekly_artist_matrix(self, start = None, end = None):
+            """
+            Get the counts of the artists for each week in the weekly chart
+            list, for a given date range, as a week x artist matrix. If no date
+            range is supplied, all the weeks are included.
+            
+            @param start:    the date from which the weeks should be included (optional)
+            @type start:     C{datetime.datetime}
+            @param end:      the date up to which the weeks should be included (optional)
+            @type end:       C{datetime.datetime}
+            
+            @return:         the counts of the artists by the weeks
+            @rtype:          L{WeeklyChartMatrix}
+            """
+            from lastfm.chart import WeeklyChartMatrix
+            return WeeklyChartMatrix.create_from_data(self, 'artist', start, end)
+        
         def get_monthly_artist_chart(self, start = None, end = None):
             from lastfm.chart import MonthlyArtistChart
             return MonthlyArtistChart.create_from_data(self, start, end)
@@ -191,7 +229,7 @@ def chartable(*chart_types):
         def recent_monthly_artist_chart(self):
             return self.get_monthly_artist_chart()
         
-        @cached_property
+        @cached_property(view = True)
         def monthly_artist_chart_list(self):
             mcl = list(self.monthly_chart_list)
             mcl.reverse()
@@ -261,7 +299,7 @@ def chartable(*chart_types):
             """
             return self.get_weekly_track_chart()
     
-        @cached_property
+        @cached_property(view = True)
         def weekly_track_chart_list(self):
             """
             a list of all track charts for this group in reverse-chronological
@@ -279,6 +317,23 @@ def chartable(*chart_types):
                         logging.log_silenced_exceptions(ex)
             return gen()
         
+        def get_weekly_track_matrix(self, start = None, end = None):
+            """
+            Get the counts of the tracks for each week in the weekly chart
+            list, for a given date range, as a week x track matrix. If no date
+            range is supplied, all the weeks are included.
+            
+            @param start:    the date from which the weeks should be included (optional)
+            @type start:     C{datetime.datetime}
+            @param end:      the date up to which the weeks should be included (optional)
+            @type end:       C{datetime.datetime}
+            
+            @return:         the counts of the tracks by the weeks
+            @rtype:          L{WeeklyChartMatrix}
+            """
+            from lastfm.chart import WeeklyChartMatrix
+            return WeeklyChartMatrix.create_from_data(self, 'track', start, end)
+        
         def get_monthly_track_chart(self, start = None, end = None):
             from lastfm.chart import MonthlyTrackChart
             return MonthlyTrackChart.create_from_data(self, start, end)
@@ -287,7 +342,7 @@ def chartable(*chart_types):
         def recent_monthly_track_chart(self):
             return self.get_monthly_track_chart()
         
-        @cached_property
+        @cached_property(view = True)
         def monthly_track_chart_list(self):
             mcl = list(self.monthly_chart_list)
             mcl.reverse()
@@ -359,7 +414,7 @@ def chartable(*chart_types):
             """
             return self.get_weekly_tag_chart()
     
-        @cached_property
+        @cached_property(view = True)
         def weekly_tag_chart_list(self):
             """
             a list of all tag charts for this group in reverse-chronological
@@ -377,6 +432,23 @@ def chartable(*chart_types):
                         logging.log_silenced_exceptions(ex)
             return gen()
         
+        def get_weekly_tag_matrix(self, start = None, end = None):
+            """
+            Get the counts of the tags for each week in the weekly chart
+            list, for a given date range, as a week x tag matrix. If no date
+            range is supplied, all the weeks are included.
+            
+            @param start:    the date from which the weeks should be included (optional)
+            @type start:     C{datetime.datetime}
+            @param end:      the date up to which the weeks should be included (optional)
+            @type end:       C{datetime.datetime}
+            
+            @return:         the counts of the tags by the weeks
+            @rtype:          L{WeeklyChartMatrix}
+            """
+            from lastfm.chart import WeeklyChartMatrix
+            return WeeklyChartMatrix.create_from_data(self, 'tag', start, end)
+        
         def get_monthly_tag_chart(self, start = None, end = None):
             from lastfm.chart import MonthlyTagChart
             return MonthlyTagChart.create_from_data(self, start, end)
@@ -385,7 +457,7 @@ def chartable(*chart_types):
         def recent_monthly_tag_chart(self):
             return self.get_monthly_tag_chart()
         
-        @cached_property
+        @cached_property(view = True)
         def monthly_tag_chart_list(self):
             mcl = list(self.monthly_chart_list)
             mcl.reverse()
@@ -425,6 +497,12 @@ def chartable(*chart_types):
         cls.weekly_chart_list = weekly_chart_list
         cls.monthly_chart_list = monthly_chart_list
         
+        # the caches of the charts of the subject, kept by lastfm.chart on
+        # the instances when first used
+        cls._weekly_partials = None
+        cls._chart_indices = None
+        cls._rolling_chart_lists = None
+        
         if not hasattr(cls, '_default_params'):
             cls._default_params = _default_params
         
@@ -434,6 +512,7 @@ def chartable(*chart_types):
         
         method_names = [
             'get_weekly_%s_chart', 'recent_weekly_%s_chart', 'weekly_%s_chart_list',
+            'get_weekly_%s_matrix',
             'get_monthly_%s_chart', 'recent_monthly_%s_chart', 'monthly_%s_chart_list',
             'get_quaterly_%s_chart', 'recent_quaterly_%s_chart',
             'get_half_yearly_%s_chart', 'recent_half_yearly_%s_chart',
@@ -5,29 +5,337 @@ __version__ = "0.2"
 __license__ = "GNU Lesser General Public License"
 __package__ = "lastfm.mixin"
 
-from lastfm.util import lazylist
+from collections import deque
+from Queue import Empty, Queue
+from threading import Event, Thread
+from lastfm.util import cache_key
+from lastfm.util._lazylist import LazyList
+from lastfm.util.visitedset import encode_key
+
+_NEIGHBOUR_BUFFER = 100
+"""the number of related entities of an entity that a worker of a concurrent
+crawl finds ahead of the crawl"""
+
+class _CrawlCheckpoint(object):
+    """
+    An on-disk store of the state of a crawl (the visited entities and the
+    frontier), kept in an SQLite database. Only the changes since the
+    previous checkpoint are written at each checkpoint.
+    """
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread = False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS visited (key TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS frontier
+                (seq INTEGER PRIMARY KEY, hsh TEXT, depth INTEGER);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+        """)
+        self._db.commit()
+
+    def load(self):
+        """
+        Get an iterator over the visited keys, the frontier and the next sequence number of
+        the frontier, as last checkpointed, or None if there is no checkpoint.
+        """
+        meta = dict(self._db.execute("SELECT name, value FROM meta"))
+        if 'next_seq' not in meta:
+            return None
+        visited = (tuple(json.loads(k))
+                   for (k,) in self._db.execute("SELECT key FROM visited"))
+        frontier = deque((seq, json.loads(hsh), depth)
+                         for (seq, hsh, depth) in self._db.execute(
+                             "SELECT seq, hsh, depth FROM frontier WHERE seq >= ? ORDER BY seq",
+                             (meta['head'],)))
+        return (visited, frontier, meta['next_seq'])
+
+    def save(self, keys, entries, head, next_seq):
+        """
+        Record the newly visited keys and frontier entries, and the position
+        of the frontier from where the crawl should be resumed.
+        """
+        db = self._db
+        db.executemany("INSERT OR IGNORE INTO visited (key) VALUES (?)",
+                       ((encode_key(k),) for k in keys))
+        db.executemany("INSERT OR REPLACE INTO frontier (seq, hsh, depth) VALUES (?, ?, ?)",
+                       ((seq, encode_key(hsh), depth) for (seq, hsh, depth) in entries))
+        db.execute("DELETE FROM frontier WHERE seq < ?", (head,))
+        db.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                       [('head', head), ('next_seq', next_seq)])
+        db.commit()
+
+    def close(self):
+        self._db.close()
 
 def crawlable(cls):
     _get_all = cls._get_all
     @staticmethod
-    def get_all(seed):
+    def get_all(seed, max_depth = None, max_nodes = None,
+                workers = None, ordered = True,
+                checkpoint = None, checkpoint_interval = 1000,
+                visited = None, edges = None):
+        """
+        Crawl the graph of the related entities, breadth first, starting
+        from the seed entity.
+        
+        If workers is given, up to that many entities are expanded
+        concurrently by a pool of that many threads, while the crawled
+        entities are consumed. The related entities are passed on from the
+        threads as they are found, so that the crawls whose entities have
+        infinitely many related entities (like L{Album.get_all}) work too.
+        The threads stop when the crawl ends or is abandoned. The HTTP
+        requests still go through the rate limiter of the L{Api}. 
+        
+        If checkpoint is given, the state of the crawl is saved in that file
+        periodically, and a crawl started again with the same file resumes
+        from the last saved state, returning only the entities not returned
+        before it. The entities returned after the last checkpoint may be
+        returned again on resuming. The crawl is then returned as a plain
+        iterator instead of a lazylist, so that no entity is computed (and
+        recorded as visited) before it is asked for.
+        
+        The visited entities are kept in a set by default. For very large
+        crawls, a L{ScalableBloomFilter} or a L{BloomFilter} can be given
+        instead, which use a small fraction of the memory, at the cost of
+        missing the entities they wrongly claim to contain, or a L{SpillSet},
+        which is exact but keeps most of the entities on disk.
+        
+        If edges is given, an edge from each expanded entity to each of its
+        related entities (including the already visited ones) is added to it
+        as they are found, weighted by the match of the related entity
+        (C{stats.match}) if it has one. The edges found after the last
+        checkpoint may be added again on resuming a crawl.
+        
+        @param seed:                 the entity to start the crawl from
+        @type seed:                  L{LastfmBase}
+        @param max_depth:            the maximum distance of the crawled entities
+                                     from the seed (optional)
+        @type max_depth:             L{int}
+        @param max_nodes:            the maximum number of entities crawled (optional)
+        @type max_nodes:             L{int}
+        @param workers:              the number of entities to expand concurrently
+                                     (optional)
+        @type workers:               L{int}
+        @param ordered:              flag to return the entities in the same order
+                                     as a sequential crawl, when crawling concurrently.
+                                     Otherwise the entities are returned as soon as
+                                     they are found. (optional)
+        @type ordered:               L{bool}
+        @param checkpoint:           path of the file to save the crawl state in
+                                     (optional)
+        @type checkpoint:            L{str}
+        @param checkpoint_interval:  the number of entities crawled between
+                                     successive checkpoints (optional)
+        @type checkpoint_interval:   L{int}
+        @param visited:              an empty set like object, with add and
+                                     __contains__ methods, to keep the keys of
+                                     the visited entities in (optional)
+        @type visited:               L{set}, L{BloomFilter},
+                                     L{ScalableBloomFilter} or L{SpillSet}
+        @param edges:                an object with an add(source, target, weight)
+                                     method, to add the crawled edges to, with
+                                     the keys of the entities as source and
+                                     target (optional)
+        @type edges:                 L{EdgeList} or L{EdgeTable}
+        
+        @return:                     the crawled entities, the seed being the
+                                     first one
+        @rtype:                      L{lazylist}, or iterator if checkpoint is given
+        
+        @raise InvalidParametersError: If checkpoint is given for a crawl of
+                                       entities which are identified by other
+                                       entities (like L{Album}s by their artists),
+                                       as those cannot be saved.
+        """
         seed, hash_attrs, spider_func = _get_all(seed)
-        @lazylist
-        def gen(lst):
-            seen = []
+        
+        def hash_dict(item):
+            return dict((a, getattr(item, a)) for a in hash_attrs)
+        
+        def key(hsh):
+            return tuple(cache_key(hsh[a]) for a in hash_attrs)
+        
+        def weight(item):
+            stats = getattr(item, 'stats', None)
+            return getattr(stats, 'match', None)
+        
+        def check_plain(hsh):
+            for v in hsh.itervalues():
+                if v is not None and not isinstance(v, (basestring, int, long, float)):
+                    raise InvalidParametersError(
+                        "crawls of %s entities cannot be checkpointed" % cls.__name__)
+        
+        # the expanders below pop the entries (seq, hsh, depth) from the
+        # frontier, keeping their seq in pending till all of their related
+        # entities are processed, and yield (entity, depth, source key) for
+        # each related entity followed by (None, seq, None) when done with
+        # an entry.
+        
+        def expanded(api, frontier, pending):
+            while frontier:
+                seq, hsh, depth = frontier.popleft()
+                if max_depth is None or depth < max_depth:
+                    pending.add(seq)
+                    source = key(hsh)
+                    for n in spider_func(api, hsh):
+                        yield (n, depth, source)
+                yield (None, seq, None)
+        
+        def expanded_concurrently(api, frontier, pending):
+            # the workers take (seq, hsh, out) tasks and put (seq, entity,
+            # None) in out for each related entity, then (seq, None, None)
+            # when done, or (seq, None, error) if the expansion fails. Each
+            # expansion has its own bounded out queue when ordered, so that
+            # its entities can be consumed in turn, and they share one
+            # otherwise.
+            tasks = Queue()
+            stopped = Event()
+            shared = Queue(_NEIGHBOUR_BUFFER * workers)
+            def work():
+                while True:
+                    task = tasks.get()
+                    if task is None:
+                        return
+                    seq, hsh, out = task
+                    try:
+                        for n in spider_func(api, hsh):
+                            if stopped.is_set():
+                                break
+                            out.put((seq, n, None))
+                        else:
+                            out.put((seq, None, None))
+                    except Exception, e:
+                        out.put((seq, None, e))
+            
+            threads = []
+            for i in xrange(workers):
+                thread = Thread(target = work)
+                thread.setDaemon(True)
+                thread.start()
+                threads.append(thread)
+            dispatched = {}
+            order = deque()
+            try:
+                while frontier or order:
+                    while frontier and len(order) < workers:
+                        seq, hsh, depth = frontier.popleft()
+                        if max_depth is not None and depth >= max_depth:
+                            yield (None, seq, None)
+                            continue
+                        pending.add(seq)
+                        out = ordered and Queue(_NEIGHBOUR_BUFFER) or shared
+                        dispatched[seq] = (depth, key(hsh), out)
+                        order.append(seq)
+                        tasks.put((seq, hsh, out))
+                    if not order:
+                        continue
+                    if ordered:
+                        seq, n, error = dispatched[order[0]][2].get()
+                    else:
+                        seq, n, error = shared.get()
+                    if error is not None:
+                        raise error
+                    depth, source, out = dispatched[seq]
+                    if n is not None:
+                        yield (n, depth, source)
+                        continue
+                    del dispatched[seq]
+                    order.remove(seq)
+                    yield (None, seq, None)
+            finally:
+                # unblock the workers waiting to put in the full queues, and
+                # let them go
+                stopped.set()
+                queues = set(out for (depth, source, out) in dispatched.itervalues())
+                queues.add(shared)
+                for out in queues:
+                    try:
+                        while True:
+                            out.get_nowait()
+                    except Empty:
+                        pass
+                for thread in threads:
+                    tasks.put(None)
+        
+        def crawl():
             api = seed._api
+            seed_hsh = hash_dict(seed)
+            store = None
+            state = None
+            if checkpoint is not None:
+                check_plain(seed_hsh)
+                store = _CrawlCheckpoint(checkpoint)
+                state = store.load()
+            seen = set() if visited is None else visited
+            if state is None:
+                seen.add(key(seed_hsh))
+                count = 1
+                frontier = deque([(0, seed_hsh, 0)])
+                next_seq = 1
+                new_keys = [key(seed_hsh)]
+                new_entries = list(frontier)
+                yield seed
+            else:
+                keys, frontier, next_seq = state
+                count = 0
+                for k in keys:
+                    seen.add(k)
+                    count += 1
+                new_keys = []
+                new_entries = []
             
-            def hash_dict(item):
-                return dict((a, getattr(item, a)) for a in hash_attrs)
+            pending = set()
+            def save():
+                if pending:
+                    head = min(pending)
+                elif frontier:
+                    head = frontier[0][0]
+                else:
+                    head = next_seq
+                store.save(new_keys, new_entries, head, next_seq)
+                del new_keys[:]
+                del new_entries[:]
             
-            seen.append(hash_dict(seed))
-            yield seed
-            for hsh in seen:
-                for n in spider_func(api, hsh):
-                    if hash_dict(n) not in seen:
-                        seen.append(hash_dict(n))
-                        yield n
-        return gen()
+            if workers:
+                neighbours = expanded_concurrently(api, frontier, pending)
+            else:
+                neighbours = expanded(api, frontier, pending)
+            found = 0
+            for n, depth, source in neighbours:
+                if n is None:
+                    # done with the frontier entry with seq depth
+                    pending.discard(depth)
+                    if store is not None and found >= checkpoint_interval:
+                        save()
+                        found = 0
+                    continue
+                if max_nodes is not None and count >= max_nodes:
+                    break
+                n_hsh = hash_dict(n)
+                n_key = key(n_hsh)
+                if edges is not None:
+                    edges.add(source, n_key, weight(n))
+                if n_key not in seen:
+                    seen.add(n_key)
+                    count += 1
+                    entry = (next_seq, n_hsh, depth + 1)
+                    next_seq += 1
+                    frontier.append(entry)
+                    if store is not None:
+                        check_plain(n_hsh)
+                        new_keys.append(n_key)
+                        new_entries.append(entry)
+                        found += 1
+                    yield n
+            if store is not None:
+                save()
+                store.close()
+        if checkpoint is not None:
+            # a plain iterator, which does not run ahead of its consumer, so
+            # that a checkpoint only records the entities handed out
+            return crawl()
+        # not a recursive lazylist, so that an abandoned crawl is closed
+        # (and its workers stopped) as soon as it is not referred to
+        return LazyList(crawl())
     
     cls.get_all = get_all
     delattr(cls, '_get_all')
@@ -35,4 +343,9 @@ def crawlable(cls):
     if not hasattr(cls, '_mixins'):
         cls._mixins = []
     cls._mixins.append('get_all')
-    return cls
\ No newline at end of file
+    return cls
+
+import json
+import sqlite3
+
+from lastfm.error import InvalidParametersError
@@ -5,39 +5,46 @@ __version__ = "0.2"
 __license__ = "GNU Lesser General Public License"
 __package__ = "lastfm.mixin"
 
+class _Property(property):
+    """
+    A read-only property returning the value of the underscore prefixed
+    attribute of the same name, or None if it is not set. The attribute
+    name is computed once, when the property is created, and the getter
+    made by L{_getter} for it reads it with a single getattr call.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.slot = "_%s" % name
+        super(_Property, self).__init__(self._getter(self.slot))
+
+    @staticmethod
+    def _getter(slot):
+        def get(ob):
+            return getattr(ob, slot, None)
+        return get
+
+class _FillableProperty(_Property):
+    """
+    A L{_Property} which calls C{_fill_info} on the object if the value
+    is not already set.
+    """
+    @staticmethod
+    def _getter(slot):
+        def get(ob):
+            value = getattr(ob, slot, None)
+            if value is None:
+                ob._fill_info()
+                value = getattr(ob, slot)
+            return value
+        return get
+
 def property_adder(cls):
     for p in cls.Meta.properties:
         if not hasattr(cls, p):
-            def wrapper():
-                q = p
-                @property
-                def get(self):
-                    try:
-                        return getattr(self, "_{0}".format(q))
-                    except AttributeError:
-                        return None
-                return get
-            setattr(cls, p, wrapper())
-            
+            setattr(cls, p, _Property(p))
+
     if hasattr(cls.Meta, 'fillable_properties'):
         for p in cls.Meta.fillable_properties:
             if not hasattr(cls, p):
-                def wrapper():
-                    q = p
-                    @property
-                    def get(self):
-                        fill = False
-                        try:
-                            attrval = getattr(self, "_{0}".format(q))
-                            if attrval is None:
-                                fill = True
-                            else:
-                                return attrval
-                        except AttributeError:
-                            fill = True
-                        if fill:
-                            self._fill_info()
-                            return getattr(self, "_{0}".format(q))
-                    return get
-                setattr(cls, p, wrapper())
-    return cls
\ No newline at end of file
+                setattr(cls, p, _FillableProperty(p))
+    return cls
@@ -7,6 +7,7 @@ __package__ = "lastfm"
 
 from lastfm.base import LastfmBase
 from lastfm.mixin import mixin
+from lastfm.util import cache_key
 from lastfm.decorators import cached_property
 
 @mixin("cacheable", "property_adder")
@@ -22,12 +23,12 @@ class Shout(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash("%s%s" % (kwds['body'], kwds['author']))
+            return (kwds['body'], cache_key(kwds['author']))
         except KeyError:
             raise InvalidParametersError("body and author have to be provided for hashing")
 
     def __hash__(self):
-        return self.__class__._hash_func(body = self.body, author = self.author)
+        return hash(self.__class__._hash_func(body = self.body, author = self.author))
 
     def __eq__(self, other):
         return (
@@ -7,7 +7,7 @@ __package__ = "lastfm"
 
 from lastfm.base import LastfmBase
 from lastfm.mixin import mixin
-from lastfm.util import UTC, safe_int, safe_float
+from lastfm.util import UTC, safe_int, safe_float, cache_key
 from lastfm.decorators import cached_property, top_property
 
 @mixin("crawlable", "sharable", "taggable",
@@ -278,12 +278,12 @@ class Track(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash("%s%s" % (kwds['name'], hash(kwds['artist'])))
+            return (kwds['name'], cache_key(kwds['artist']))
         except KeyError:
             raise InvalidParametersError("name and artist have to be provided for hashing")
 
     def __hash__(self):
-        return self.__class__._hash_func(name = self.name, artist = self.artist)
+        return hash(self.__class__._hash_func(name = self.name, artist = self.artist))
 
     def __eq__(self, other):
         if self.mbid and other.mbid:
@@ -7,7 +7,7 @@ __package__ = "lastfm"
 
 from lastfm.base import LastfmBase
 from lastfm.mixin import chartable, mixin
-from lastfm.util import UTC, safe_int, safe_float
+from lastfm.util import UTC, safe_int, safe_float, cache_key
 import lastfm.playlist
 from lastfm.decorators import (
     cached_property, top_property, authentication_required, depaginate)
@@ -511,12 +511,12 @@ class User(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash(kwds['name'])
+            return kwds['name']
         except KeyError:
             raise InvalidParametersError("name has to be provided for hashing")
 
     def __hash__(self):
-        return self.__class__._hash_func(name = self.name)
+        return hash(self.__class__._hash_func(name = self.name))
 
     def __eq__(self, other):
         return self.name == other.name
@@ -566,12 +566,12 @@ class User(LastfmBase):
         @staticmethod
         def _hash_func(*args, **kwds):
             try:
-                return hash(kwds['id'])
+                return kwds['id']
             except KeyError:
                 raise InvalidParametersError("id has to be provided for hashing")
 
         def __hash__(self):
-            return self.__class__._hash_func(id = self.id)
+            return hash(self.__class__._hash_func(id = self.id))
 
         def __repr__(self):
             return "<lastfm.User.Playlist: %s>" % self.title
@@ -759,12 +759,12 @@ class User(LastfmBase):
         @staticmethod
         def _hash_func(*args, **kwds):
             try:
-                return hash(kwds['user'])
+                return cache_key(kwds['user'])
             except KeyError:
                 raise InvalidParametersError("user has to be provided for hashing")
 
         def __hash__(self):
-            return self.__class__._hash_func(user = self.user)
+            return hash(self.__class__._hash_func(user = self.user))
 
         def __repr__(self):
             return "<lastfm.User.Library: for user '%s'>" % self.user.name
@@ -7,11 +7,15 @@ from lastfm.util.wormhole import Wormhole
 from lastfm.util._lazylist import lazylist
 from lastfm.util.safelist import SafeList
 from lastfm.util.filecache import FileCache
-from lastfm.util.objectcache import ObjectCache
+from lastfm.util.objectcache import ObjectCache, cache_key
+from lastfm.util.visitedset import BloomFilter, ScalableBloomFilter, SpillSet
+from lastfm.util.edgelist import EdgeList, EdgeTable
 from dateutil import zoneinfo
 
 __all__ = ['Wormhole', 'lazylist', 'SafeList',
-           'FileCache', 'ObjectCache', 'UTC']
+           'FileCache', 'ObjectCache', 'cache_key',
+           'BloomFilter', 'ScalableBloomFilter', 'SpillSet',
+           'EdgeList', 'EdgeTable', 'UTC']
 
 UTC = zoneinfo.gettz('UTC')
 
@@ -23,6 +27,6 @@ def safe_int(integer):
 
 def safe_float(floatish):
     try:
-        return int(floatish)
+        return float(floatish)
     except ValueError:
         return 0
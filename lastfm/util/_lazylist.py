@@ -3,6 +3,11 @@ this module defines a class LazyList which can be used to represent sequences
 of values generated lazily. One can also create recursively defined lazy lists
 that generate their values based on ones previously generated.
 
+LazyLists are thread safe. Only one thread at a time advances the underlying
+iterator, while the other threads needing values not yet computed wait for it.
+Optionally, a background thread can compute values ahead of the consumers
+(see L{LazyList.read_ahead}).
+
 Backport to python 2.5 by Michael Pust
 """
 
@@ -11,14 +16,36 @@ __all__ = ('LazyList', 'RecursiveLazyList', 'lazylist')
 __package__ = "lastfm.util"
 
 import itertools
+import weakref
+try:
+    from thread import get_ident
+    from threading import Condition, Lock, Thread
+except ImportError:
+    from dummy_thread import get_ident
+    from dummy_threading import Condition, Lock, Thread
 
 class LazyList(object):
     """A Sequence whose values are computed lazily by an iterator.
     """
-    def __init__(self, iterable):
+    BATCH_SIZE = 64
+    """The number of values computed between the wake ups of the waiting
+    threads while exhausting the iterator"""
+
+    def __init__(self, iterable, source = None):
+        """Create a LazyList of the values of iterable. source, if given, is
+        a callable returning a fresh iterator over the same values, used
+        for streaming them (see L{LazyList.stream})."""
         self._exhausted = False
         self._iterator = iter(iterable)
+        self._source = source
         self._data = []
+        self._lock = Lock()
+        self._condition = Condition(self._lock)
+        self._producer = None
+        self._waiting = 0
+        self._read_ahead = 0
+        self._furthest = -1
+        self._error = None
 
     def __len__(self):
         """Get the length of a LazyList's computed data."""
@@ -26,43 +53,151 @@ class LazyList(object):
     
     def __getitem__(self, i):
         """Get an item from a LazyList.
-        i should be a positive integer or a slice object."""
-        if isinstance(i, int):
-            #index has not yet been yielded by iterator (or iterator exhausted
-            #before reaching that index)
-            if i >= len(self):
-                self.exhaust(i)
-            elif i < 0:
-                raise ValueError('cannot index LazyList with negative number')
-            return self._data[i]
+        i should be an integer or a slice object. Negative indices and
+        slice values can be used only after the LazyList is exhausted."""
+        if isinstance(i, (int, long)):
+            data = self._data
+            if i < 0:
+                if not self._exhausted:
+                    raise ValueError('cannot index LazyList with negative number')
+            elif i >= len(data):
+                #index has not yet been yielded by iterator (or iterator exhausted
+                #before reaching that index)
+                self._need(i)
+            elif self._read_ahead:
+                self._consumed(i)
+            return data[i]
 
         #LazyList slices are iterators over a portion of the list.
         elif isinstance(i, slice):
             start, stop, step = i.start, i.stop, i.step
             if any(x is not None and x < 0 for x in (start, stop, step)):
-                raise ValueError('cannot index or step through a LazyList with'
-                                 'a negative number')
+                if not self._exhausted:
+                    raise ValueError('cannot index or step through a LazyList with'
+                                     'a negative number')
+                return iter(self._data[i])
+            #slices of the computed data are served directly from it
+            if self._exhausted or (stop is not None and stop <= len(self._data)):
+                return iter(self._data[i])
             #set start and step to their integer defaults if they are None.
             if start is None:
                 start = 0
             if step is None:
                 step = 1
-
-            def LazyListIterator():
-                count = start
-                predicate = (stop is None) and (lambda: True) or (lambda: count < stop)
-                while predicate():
-                    try:
-                        yield self[count]
-                    #slices can go out of actual index range without raising an
-                    #error
-                    except IndexError:
-                        break
-                    count += step
-            return LazyListIterator()
+            return self._iterate(start, stop, step)
 
         raise TypeError('i must be an integer or slice')
 
+    def _iterate(self, start, stop, step):
+        data = self._data
+        index = start
+        while stop is None or index < stop:
+            computed = len(data)
+            if stop is not None and stop < computed:
+                computed = stop
+            if index < computed:
+                if self._read_ahead:
+                    #keep track of the position for the read ahead thread
+                    self._consumed(index)
+                    yield data[index]
+                    index += step
+                    continue
+                #yield the computed values in one go
+                for value in data[index:computed:step]:
+                    yield value
+                index += ((computed - index - 1) // step + 1) * step
+                continue
+            if self._exhausted:
+                break
+            #compute the values one at a time, as they are needed, as each of
+            #them may cost a fetch
+            self._need(index)
+            if index >= len(data):
+                break
+
+    def _need(self, index):
+        """Compute the value at index, unless the iterator is exhausted
+        before it. While reading ahead, the value is left to the read ahead
+        thread to compute, and this only waits for it."""
+        if self._read_ahead:
+            self._consumed(index)
+            with self._lock:
+                while (self._read_ahead and not self._exhausted and index >= len(self._data)
+                       and self._producer != get_ident()):
+                    if self._error is not None:
+                        #raised by the iterator in the read ahead thread
+                        error, self._error = self._error, None
+                        raise error
+                    self._waiting += 1
+                    self._condition.wait()
+                    self._waiting -= 1
+        self.exhaust(index)
+
+    def _consumed(self, index):
+        if self._producer == get_ident():
+            #read by the iterator itself, not by a consumer
+            return
+        if index > self._furthest:
+            self._furthest = index
+        if len(self._data) <= index + self._read_ahead:
+            with self._condition:
+                self._condition.notify_all()
+
+    def read_ahead(self, count):
+        """Compute up to count values ahead of the furthest index accessed by
+        the consumers of this LazyList, in a background thread. This way,
+        slow consumers overlap their processing with the fetching of the
+        values. Pass 0 to stop reading ahead.
+        An exception raised by the iterator in the background thread is
+        re-raised to the consumer which needs the next value, and stops the
+        reading ahead.
+        Returns this LazyList."""
+        condition = self._condition
+        with condition:
+            start = not self._read_ahead
+            self._read_ahead = count
+            condition.notify_all()
+        if start and count:
+            def wake(ref):
+                with condition:
+                    condition.notify_all()
+            thread = Thread(target = LazyList._read_ahead_worker,
+                            args = (weakref.ref(self, wake), condition))
+            thread.setDaemon(True)
+            thread.start()
+        return self
+
+    @staticmethod
+    def _read_ahead_worker(ref, condition):
+        #holds the LazyList by a weak reference while waiting, so that an
+        #abandoned LazyList can be garbage collected (which wakes it up)
+        while True:
+            with condition:
+                lst = ref()
+                if lst is None or not lst._read_ahead or lst._exhausted:
+                    return
+                if lst._furthest + lst._read_ahead < len(lst._data):
+                    del lst
+                    condition.wait()
+                    continue
+            #compute one value at a time, so that a waiting consumer gets
+            #each of them as soon as it is computed
+            try:
+                lst.exhaust(len(lst._data))
+            except Exception, e:
+                with condition:
+                    lst._error = e
+                    lst._read_ahead = 0
+                    condition.notify_all()
+                return
+            finally:
+                del lst
+
+    def __copy__(self):
+        """LazyLists share their computed values and their iterator, so a
+        copy is the LazyList itself."""
+        return self
+
     def __iter__(self):
         """return an iterator over each value in the sequence,
         whether it has been computed yet or not."""
@@ -73,6 +208,37 @@ class LazyList(object):
         already been computed."""
         return self[:len(self)]
 
+    def stream(self):
+        """Return an iterator over the values which does not keep them in the
+        LazyList, so that a huge sequence can be iterated over once in
+        constant memory. The values are produced afresh from the source of
+        the LazyList, so only the LazyLists created with a source can be
+        streamed (the depaginated results of the API, for example).
+        Raises TypeError if the LazyList has no source."""
+        if self._source is None:
+            raise TypeError('this LazyList has no source to stream its values from')
+        return iter(self._source())
+
+    def chunks(self, size):
+        """Return an iterator over lists of size values each (the last one
+        may be shorter), streamed as by L{LazyList.stream}.
+        Raises ValueError if size is not positive, and TypeError if the
+        LazyList has no source."""
+        if size < 1:
+            raise ValueError('chunk size must be a positive number')
+        return LazyList._chunks(self.stream(), size)
+
+    @staticmethod
+    def _chunks(iterator, size):
+        while True:
+            chunk = list(itertools.islice(iterator, size))
+            if not chunk:
+                break
+            yield chunk
+
+    def __repr__(self):
+        return "<lastfm.lazylist>"
+
     def exhaust(self, index = None):
         """Exhaust the iterator generating this LazyList's values.
         if index is None, this will exhaust the iterator completely.
@@ -81,17 +247,55 @@ class LazyList(object):
         """
         if self._exhausted:
             return
-        if index is None:
-            ind_range = itertools.count(len(self))
-        else:
-            ind_range = range(len(self), index + 1)
+        data = self._data
+        lock = self._lock
+        condition = self._condition
+        with lock:
+            while not (self._exhausted or (index is not None and index < len(data))):
+                if self._error is not None:
+                    #raised by the iterator in the read ahead thread
+                    error, self._error = self._error, None
+                    raise error
+                if self._producer is None:
+                    self._producer = get_ident()
+                    break
+                if self._producer == get_ident():
+                    #called from within the iterator itself, values beyond
+                    #the computed ones cannot be produced now
+                    return
+                self._waiting += 1
+                condition.wait()
+                self._waiting -= 1
+            else:
+                return
 
-        for ind in ind_range:
-            try:
-                self._data.append(self._iterator.next())
-            except StopIteration: #iterator is fully exhausted
-                self._exhausted = True
-                break
+        #produce the values outside the lock, in batches, waking up the
+        #waiting threads (if any) after each batch
+        try:
+            while index is None or index >= len(data):
+                count = self.BATCH_SIZE
+                if index is not None and index + 1 - len(data) < count:
+                    count = index + 1 - len(data)
+                if count == 1:
+                    try:
+                        data.append(self._iterator.next())
+                    except StopIteration: #iterator is fully exhausted
+                        self._exhausted = True
+                        break
+                else:
+                    computed = len(data)
+                    data.extend(itertools.islice(self._iterator, count))
+                    if len(data) - computed < count: #iterator is fully exhausted
+                        self._exhausted = True
+                        break
+                if self._waiting:
+                    with lock:
+                        condition.notify_all()
+        finally:
+            with lock:
+                self._producer = None
+                if self._waiting:
+                    condition.notify_all()
 
 class RecursiveLazyList(LazyList):
     def __init__(self, prod, *args, **kwds):
@@ -139,4 +343,4 @@ if __name__ == '__main__':
     primes = primegen() #same for primes- treat it like an infinitely long list
                         #containing all prime numbers.
     print fibs[0], fibs[1], fibs[2], primes[0], primes[1], primes[2]
-    print list(fibs[:10]), list(primes[:10])
+    print list(fibs[:10]), list(primes[:10])
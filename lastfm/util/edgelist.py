@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Module for recording the edges of the graphs crawled"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+__package__ = "lastfm.util"
+
+import codecs
+import json
+import sqlite3
+
+from lastfm.util.visitedset import encode_key
+
+class EdgeList(object):
+    """
+    A text file of the edges of a graph, one edge per line, with the keys
+    of the source and the target (JSON encoded) and the weight, separated
+    by tabs. The edges are written as they are added.
+    """
+    def __init__(self, path, mode = 'w'):
+        self.path = path
+        self._file = codecs.open(path, mode, 'utf-8')
+
+    def add(self, source, target, weight = None):
+        self._file.write(u"%s\t%s\t%s\n" % (
+            encode_key(source), encode_key(target),
+            weight is not None and repr(float(weight)) or ''))
+
+    def __iter__(self):
+        """iterate over the edges (source, target, weight) written so far"""
+        self._file.flush()
+        for line in codecs.open(self.path, 'r', 'utf-8'):
+            source, target, weight = line.rstrip(u'\n').split(u'\t')
+            yield (_decode_key(source), _decode_key(target),
+                   float(weight) if weight else None)
+
+    def close(self):
+        self._file.close()
+
+class EdgeTable(object):
+    """
+    A table of the edges of a graph in an SQLite database, with the nodes
+    numbered in a separate table, so that each edge is stored as a pair of
+    integers and a weight. The ids of the nodes are cached in memory. The
+    edges are added to those already in the database, and are written in
+    batches of BATCH_SIZE and when the table is iterated over or closed.
+    """
+    BATCH_SIZE = 1000
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread = False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS nodes (id INTEGER PRIMARY KEY, key TEXT UNIQUE);
+            CREATE TABLE IF NOT EXISTS edges (source INTEGER, target INTEGER, weight REAL);
+            CREATE INDEX IF NOT EXISTS edges_source ON edges (source);
+        """)
+        self._db.commit()
+        self._pending = []
+        self._node_ids = {}
+
+    def _node_id(self, key):
+        id = self._node_ids.get(key)
+        if id is None:
+            k = encode_key(key)
+            row = self._db.execute("SELECT id FROM nodes WHERE key = ?", (k,)).fetchone()
+            if row is not None:
+                id = row[0]
+            else:
+                id = self._db.execute("INSERT INTO nodes (key) VALUES (?)", (k,)).lastrowid
+            self._node_ids[key] = id
+        return id
+
+    def add(self, source, target, weight = None):
+        self._pending.append((self._node_id(source), self._node_id(target), weight))
+        if len(self._pending) >= self.BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        self._db.executemany("INSERT INTO edges (source, target, weight) VALUES (?, ?, ?)",
+                             self._pending)
+        self._db.commit()
+        self._pending = []
+
+    def __iter__(self):
+        """iterate over the edges (source, target, weight) added so far"""
+        self._flush()
+        for source, target, weight in self._db.execute("""
+                SELECT s.key, t.key, e.weight FROM edges e
+                JOIN nodes s ON s.id = e.source JOIN nodes t ON t.id = e.target
+                ORDER BY e.rowid"""):
+            yield (_decode_key(source), _decode_key(target), weight)
+
+    def close(self):
+        self._flush()
+        self._db.close()
+
+def _decode_key(s):
+    return _tuples(json.loads(s))
+
+def _tuples(key):
+    """the key read back from JSON, with its lists (at any depth) made tuples again"""
+    if isinstance(key, list):
+        return tuple(_tuples(k) for k in key)
+    return key
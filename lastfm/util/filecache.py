@@ -40,7 +40,11 @@ class FileCache(object):
         path = self._GetPath(key)
         directory = os.path.dirname(path)
         if not os.path.exists(directory):
-            os.makedirs(directory)
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # created by another thread meanwhile
+                pass
         if not os.path.isdir(directory):
             raise _FileCacheError('%s exists but is not a directory' % directory)
         temp_fd, temp_path = tempfile.mkstemp()
@@ -5,9 +5,131 @@ __version__ = "0.2"
 __license__ = "GNU Lesser General Public License"
 __package__ = "lastfm.util"
 
+from threading import Lock
 from lastfm.util import Wormhole
     
 _registry = {}
+_lock = Lock()
+
+class _Stripe(object):
+    """
+    A stripe of the registry of a class, with its own lock, and its own
+    LRU of strong references to the most recently used of its entities.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.obs = WeakValueDictionary()
+        self.lru = OrderedDict()
+        self.retain = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def touch(self, key, ob):
+        """must be called with the lock held"""
+        if self.retain:
+            self.lru.pop(key, None)
+            self.lru[key] = ob
+            self.evict()
+
+    def evict(self):
+        """must be called with the lock held"""
+        while len(self.lru) > self.retain:
+            self.lru.popitem(last = False)
+            self.evictions += 1
+
+class _StripedRegistry(object):
+    """
+    The registry of the entities of a single class. The entities are
+    spread over a number of stripes by the hash of their keys, each stripe
+    having its own lock, so that threads registering different entities
+    do not contend for the same lock.
+    
+    Optionally, strong references to the most recently used entities are
+    kept, so that they are not garbage collected. The references are kept
+    in an LRU per stripe, updated under the lock of the stripe, each
+    bounded by the size of the retention divided by the number of the
+    stripes, rounded up. The size is thus approximate: up to a stripe count
+    more entities may be kept, and fewer when the recently used entities
+    crowd into some of the stripes.
+    """
+    def __init__(self, stripe_count):
+        self._stripes = [_Stripe() for i in xrange(stripe_count)]
+        self._retain = 0
+
+    def _stripe(self, key):
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key):
+        stripe = self._stripe(key)
+        with stripe.lock:
+            ob = stripe.obs.get(key)
+            if ob is None:
+                stripe.misses += 1
+            else:
+                stripe.hits += 1
+                stripe.touch(key, ob)
+        return ob
+
+    def add(self, ob, key):
+        stripe = self._stripe(key)
+        with stripe.lock:
+            registered = stripe.obs.get(key)
+            if registered is None:
+                stripe.obs[key] = ob
+                stripe.touch(key, ob)
+                return (ob, False)
+            stripe.touch(key, registered)
+            return (registered, True)
+
+    def retain(self, size):
+        self._retain = size
+        share = -(-size // len(self._stripes))
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.retain = share
+                stripe.evict()
+
+    @property
+    def retention_stats(self):
+        stats = {'size': self._retain, 'retained': 0, 'evictions': 0, 'hits': 0, 'misses': 0}
+        for stripe in self._stripes:
+            with stripe.lock:
+                stats['retained'] += len(stripe.lru)
+                stats['evictions'] += stripe.evictions
+                stats['hits'] += stripe.hits
+                stats['misses'] += stripe.misses
+        return stats
+
+    def values(self):
+        values = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                values.extend(stripe.obs.values())
+        return values
+
+    def __len__(self):
+        return sum(len(stripe.obs) for stripe in self._stripes)
+
+def cache_key(ob):
+    """
+    Get the identity key of an entity, as registered in the L{ObjectCache},
+    along with its class name. Values which are not registered entities
+    (like strings) are returned as they are.
+    
+    The key is built from the plain values the entity was created with, so
+    it is cheap to compare and does not collide for distinct entities.
+    
+    @param ob:      an entity or a plain value
+    @type ob:       L{LastfmBase} or any hashable value
+    
+    @return:        the identity key
+    @rtype:         L{tuple} or the type of the value
+    """
+    try:
+        return (ob.__class__.__name__, ob.__dict__['_cache_key'])
+    except (AttributeError, KeyError):
+        return ob
 
 class ObjectCache(object):
     """The registry to contain all the entities"""
@@ -25,20 +147,90 @@ class ObjectCache(object):
             'YearlyAlbumChart', 'YearlyArtistChart', 'YearlyTrackChart', 'YearlyTagChart'
             ]
     
+    STRIPE_COUNT = 16
+    """The number of lock stripes in the registry of each class"""
+    
+    @staticmethod
+    def _class_registry(cls_name):
+        try:
+            return _registry[cls_name]
+        except KeyError:
+            with _lock:
+                if cls_name not in _registry:
+                    _registry[cls_name] = _StripedRegistry(ObjectCache.STRIPE_COUNT)
+                return _registry[cls_name]
+    
+    @staticmethod
+    def get(cls_name, key):
+        """
+        Get the registered entity of a class for a key.
+        
+        @param cls_name:    the name of the class of the entity
+        @type cls_name:     L{str}
+        @param key:         the key of the entity
+        @type key:          hashable
+        
+        @return:            the registered entity, or None if no entity is
+                            registered for the key
+        @rtype:             L{LastfmBase}
+        """
+        ob = ObjectCache._class_registry(cls_name).get(key)
+        if ob is not None and Wormhole._enabled:
+            ObjectCache._found(ob, key)
+        return ob
+    
+    @staticmethod
+    @Wormhole.entrance('lfm-obcache-register')
+    def _found(ob, key):
+        """
+        Report an entity found registered to the listeners of the
+        registrations, as the registration of an entity already registered,
+        which is what finding it used to go through.
+        """
+        return (ob, True)
+    
+    @staticmethod
+    def retain(cls_name, size):
+        """
+        Keep strong references to the most recently used entities of a class,
+        so that they stay in the cache (along with their filled info) even
+        when nothing else refers to them. The limit is approximate: it is
+        shared by the lock stripes of the registry of the class, each of
+        which keeps up to its share (the size divided by L{STRIPE_COUNT},
+        rounded up) and evicts its least recently used entity beyond that.
+        
+        @param cls_name:    the name of the class of the entities
+        @type cls_name:     L{str}
+        @param size:        the maximum number of entities to keep, 0 to
+                            switch off the retention
+        @type size:         L{int}
+        
+        @raise InvalidParametersError: If the class name is not one of
+                                       L{ObjectCache.keys} or the size is negative.
+        """
+        if cls_name not in ObjectCache.keys:
+            raise InvalidParametersError("Key does not correspond to a valid class")
+        if size < 0:
+            raise InvalidParametersError("size must not be negative")
+        ObjectCache._class_registry(cls_name).retain(size)
+    
     @staticmethod
     @Wormhole.entrance('lfm-obcache-register')
     def register(ob, key):
-        cls_name = ob.__class__.__name__
-        if not cls_name in _registry:
-            _registry[cls_name] = WeakValueDictionary()
-        if key in _registry[cls_name]:
-            ob = _registry[cls_name][key]
-            #print "already registered: %s" % repr(ob)
-            return (ob, True)
-        else:
-            #print "not already registered: %s" % ob.__class__
-            _registry[cls_name][key] = ob
-            return (ob, False)
+        """
+        Register an entity for a key, unless another entity of the same
+        class is already registered for it.
+        
+        @param ob:          the entity to register
+        @type ob:           L{LastfmBase}
+        @param key:         the key of the entity
+        @type key:          hashable
+        
+        @return:            a tuple of the registered entity and a flag telling
+                            if it was already registered
+        @rtype:             L{tuple}
+        """
+        return ObjectCache._class_registry(ob.__class__.__name__).add(ob, key)
 
     @property
     def stats(self):
@@ -50,6 +242,16 @@ class ObjectCache(object):
                 counts[k] = 0
         return counts
     
+    @property
+    def retention_stats(self):
+        """
+        The lookup and retention statistics of the classes having entities
+        in the cache, as a dict of dicts with keys C{size}, C{retained},
+        C{hits}, C{misses} and C{evictions}.
+        """
+        return dict((k, _registry[k].retention_stats)
+                    for k in ObjectCache.keys if k in _registry)
+    
     def __getitem__(self, name):
         if name not in ObjectCache.keys:
             raise InvalidParametersError("Key does not correspond to a valid class")
@@ -62,5 +264,6 @@ class ObjectCache(object):
     def __repr__(self):
         return "<lastfm.ObjectCache: %s object(s) in cache>" % sum(self.stats.values())
 
+from collections import OrderedDict
 from weakref import WeakValueDictionary
 from lastfm.error import InvalidParametersError
\ No newline at end of file
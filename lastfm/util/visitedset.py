@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+"""Module for the sets of the visited entities of the crawls"""
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+__package__ = "lastfm.util"
+
+import json
+import math
+import os
+import sqlite3
+import struct
+import tempfile
+from hashlib import md5
+
+def encode_key(key):
+    """
+    Encode a key (as returned by L{cache_key}) to a string, the same for
+    the equal keys, irrespective of their tuples being lists or their
+    strings being unicode.
+    """
+    return json.dumps(key)
+
+def _digest(key):
+    """two 32 bit hashes of the key, from which the positions in the bloom filters are derived"""
+    h1, h2 = struct.unpack('<II', md5(encode_key(key).encode('utf-8')).digest()[:8])
+    return (h1, h2 | 1)
+
+class BloomFilter(object):
+    """
+    A set of a fixed memory size, which never forgets an added key but
+    may claim to contain a key not added to it, with a probability
+    of the error rate, till it contains up to capacity keys.
+    """
+    def __init__(self, capacity, error_rate = 0.001):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error rate between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hashes = max(1, int(round(self._bits * math.log(2) / capacity)))
+        self._array = bytearray((self._bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, (h1, h2)):
+        bits = self._bits
+        return [(h1 + i * h2) % bits for i in xrange(self._hashes)]
+
+    def _add_digest(self, digest):
+        array = self._array
+        for p in self._positions(digest):
+            array[p >> 3] |= 1 << (p & 7)
+        self._count += 1
+
+    def _contains_digest(self, digest):
+        array = self._array
+        for p in self._positions(digest):
+            if not array[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def add(self, key):
+        self._add_digest(_digest(key))
+
+    def __contains__(self, key):
+        return self._contains_digest(_digest(key))
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def full(self):
+        return self._count >= self.capacity
+
+    @property
+    def memory(self):
+        """the size of the bit array, in bytes"""
+        return len(self._array)
+
+class ScalableBloomFilter(object):
+    """
+    A L{BloomFilter} which grows as keys are added to it, by adding new
+    filters of growing capacities and tightening error rates, so that the
+    overall error rate stays below the given one, however many keys it
+    contains.
+    """
+    TIGHTENING = 0.5
+    def __init__(self, initial_capacity = 100000, error_rate = 0.001, growth = 2):
+        self.error_rate = error_rate
+        self._growth = growth
+        self._filters = [BloomFilter(initial_capacity,
+                                     error_rate * (1 - self.TIGHTENING))]
+
+    def _contains_digest(self, digest):
+        for f in reversed(self._filters):
+            if f._contains_digest(digest):
+                return True
+        return False
+
+    def add(self, key):
+        digest = _digest(key)
+        if self._contains_digest(digest):
+            return
+        last = self._filters[-1]
+        if last.full:
+            last = BloomFilter(last.capacity * self._growth,
+                               last.error_rate * self.TIGHTENING)
+            self._filters.append(last)
+        last._add_digest(digest)
+
+    def __contains__(self, key):
+        return self._contains_digest(_digest(key))
+
+    def __len__(self):
+        return sum(len(f) for f in self._filters)
+
+    @property
+    def memory(self):
+        """the size of the bit arrays, in bytes"""
+        return sum(f.memory for f in self._filters)
+
+class SpillSet(object):
+    """
+    An exact set which keeps up to memory_limit keys in memory, spilling
+    them to an SQLite database on disk when the limit is reached. A
+    L{ScalableBloomFilter} of the spilled keys is kept to avoid going to
+    the disk for the keys never added, unless filter_error_rate is None.
+    
+    If path is not given, a temporary file is used, which is removed when
+    the set is closed.
+    """
+    def __init__(self, path = None, memory_limit = 100000, filter_error_rate = 0.01):
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix = '.visited')
+            os.close(fd)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread = False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS visited (key TEXT PRIMARY KEY)")
+        self._db.commit()
+        self._closed = False
+        self._memory_limit = memory_limit
+        self._memory = set()
+        self._spilled = self._db.execute("SELECT COUNT(*) FROM visited").fetchone()[0]
+        self._filter = None
+        if filter_error_rate is not None:
+            self._filter = ScalableBloomFilter(max(memory_limit, 1000), filter_error_rate)
+            for (k,) in self._db.execute("SELECT key FROM visited"):
+                self._filter.add(k)
+
+    def _spill(self):
+        self._db.executemany("INSERT OR IGNORE INTO visited (key) VALUES (?)",
+                             ((k,) for k in self._memory))
+        self._db.commit()
+        if self._filter is not None:
+            for k in self._memory:
+                self._filter.add(k)
+        self._spilled += len(self._memory)
+        self._memory.clear()
+
+    def _on_disk(self, k):
+        if self._filter is not None and k not in self._filter:
+            return False
+        return self._db.execute("SELECT 1 FROM visited WHERE key = ?",
+                                (k,)).fetchone() is not None
+
+    def add(self, key):
+        k = encode_key(key)
+        if k in self._memory or self._on_disk(k):
+            return
+        self._memory.add(k)
+        if len(self._memory) >= self._memory_limit:
+            self._spill()
+
+    def __contains__(self, key):
+        k = encode_key(key)
+        return k in self._memory or self._on_disk(k)
+
+    def __len__(self):
+        return len(self._memory) + self._spilled
+
+    def close(self):
+        """spill the keys in memory to the disk, or remove the temporary file"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._temporary:
+            self._db.close()
+            os.remove(self.path)
+        else:
+            self._spill()
+            self._db.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -95,12 +95,12 @@ class Venue(LastfmBase):
     @staticmethod
     def _hash_func(*args, **kwds):
         try:
-            return hash(kwds['url'])
+            return kwds['url']
         except KeyError:
             raise InvalidParametersError("url has to be provided for hashing")
 
     def __hash__(self):
-        return self.__class__._hash_func(url = self.url)
+        return hash(self.__class__._hash_func(url = self.url))
 
     def __eq__(self, other):
         return self.url == other.url
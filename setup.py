@@ -23,6 +23,7 @@ located at http://ws.audioscrobbler.com/2.0/ .""",
 
 SETUPTOOLS_METADATA = dict(
 	install_requires = ['setuptools', 'decorator', 'python-dateutil'],
+	extras_require = {'numpy': ['numpy'], 'scipy': ['numpy', 'scipy']},
 	include_package_data = True,
     tests_require = ['wsgi_intercept'],
 	classifiers = [
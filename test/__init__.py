@@ -6,4 +6,14 @@ import test_geo
 import test_group
 import test_playlist
 import test_track
-import test_user
\ No newline at end of file
+import test_user
+import test_lazylist
+import test_crawlable
+import test_visitedset
+import test_edgelist
+import test_chart
+import test_chartcube
+import test_chartstore
+import test_objectcache
+import test_util
+import test_decorators
\ No newline at end of file
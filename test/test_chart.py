@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+import calendar
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from xml.etree import ElementTree
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import lastfm.chart
+from lastfm import Api, User
+from lastfm.chart import Chart, QuaterlyChart, RollingChart, _ArtistTags, _ChartIndex, _ChartRows
+from lastfm.chartstore import ChartStore
+from lastfm.error import InvalidParametersError, OperationFailedError
+
+WEEKS = 30
+ARTISTS = 300
+ROWS = 50
+START = calendar.timegm(datetime(2008, 1, 6, 12).timetuple())
+WEEK = 7 * 86400
+
+def weekly_chart_list():
+    charts = "".join('<chart from="%d" to="%d"/>' % (START + i * WEEK, START + (i + 1) * WEEK)
+                     for i in xrange(WEEKS))
+    return '<lfm><weeklychartlist>%s</weeklychartlist></lfm>' % charts
+
+def weekly_artist_rows(start):
+    """the (artist number, playcount) rows of the week starting at start"""
+    rnd = random.Random(int(start))
+    names = rnd.sample(xrange(ARTISTS), ROWS)
+    counts = sorted((rnd.randint(1, 100) for i in xrange(ROWS)), reverse = True)
+    return zip(names, counts)
+
+def weekly_counts(*weeks):
+    """the playcounts of the artists by their names, summed over the weeks (by their indices)"""
+    counts = {}
+    for i in weeks:
+        for n, c in weekly_artist_rows(START + i * WEEK):
+            counts['artist %d' % n] = counts.get('artist %d' % n, 0) + c
+    return counts
+
+def weekly_artist_chart(start, end):
+    rows = "".join('<artist rank="%d"><name>artist %d</name><mbid/><playcount>%d</playcount>'
+                   '<url>http://www.last.fm/music/artist+%d</url></artist>' % (r + 1, n, c, n)
+                   for (r, (n, c)) in enumerate(weekly_artist_rows(start)))
+    return '<lfm><weeklyartistchart from="%s" to="%s">%s</weeklyartistchart></lfm>' % (
+        start, end, rows)
+
+def weekly_album_chart(start, end):
+    """the albums are numbered like the artists, and made by ten artists"""
+    rows = "".join('<album rank="%d"><artist mbid="">artist %d</artist><name>album %d</name>'
+                   '<mbid/><playcount>%d</playcount><url>http://www.last.fm/music/album+%d</url>'
+                   '</album>' % (r + 1, n % 10, n, c, n)
+                   for (r, (n, c)) in enumerate(weekly_artist_rows(start)))
+    return '<lfm><weeklyalbumchart from="%s" to="%s">%s</weeklyalbumchart></lfm>' % (
+        start, end, rows)
+
+class ChartApi(Api):
+    """an Api serving generated weekly artist and album charts, the same for all subjects"""
+    def __init__(self):
+        super(ChartApi, self).__init__('chart-test', no_cache = True)
+        self.fetches = 0
+        self.tag_fetches = 0
+        self.failing = set()
+
+    def _fetch_data(self, params, sign = False, session = False, no_cache = False):
+        method = params['method']
+        if method.endswith('getWeeklyChartList'):
+            return ElementTree.XML(weekly_chart_list())
+        if method.endswith('getWeeklyArtistChart') or method.endswith('getWeeklyAlbumChart'):
+            self.fetches += 1
+            if int(params['from']) in self.failing:
+                # fails once
+                self.failing.discard(int(params['from']))
+                raise OperationFailedError("the chart is not available now")
+            if method.endswith('getWeeklyAlbumChart'):
+                return ElementTree.XML(weekly_album_chart(params['from'], params['to']))
+            return ElementTree.XML(weekly_artist_chart(params['from'], params['to']))
+        if method == 'artist.getTopTags':
+            self.tag_fetches += 1
+            return ElementTree.XML('<lfm><toptags><tag><name>tag of %s</name></tag></toptags></lfm>'
+                                   % params['artist'])
+        raise OperationFailedError("%s is not served" % method)
+
+_users = [0]
+def new_user(api = None):
+    """a new user, with partials of its own"""
+    _users[0] += 1
+    return User(api or ChartApi(), name = "chart test user %d" % _users[0])
+
+class TestChart(unittest.TestCase):
+    """ A test class for the Chart module, with generated charts. """
+
+    def setUp(self):
+        self.numpy = lastfm.chart.numpy
+
+    def tearDown(self):
+        lastfm.chart.numpy = self.numpy
+
+    def chart_counts(self, chart):
+        return dict((a.name, a.stats.playcount) for a in chart.artists)
+
+    def built(self, entries):
+        return len([e for e in entries._entries if e is not None])
+
+    def testRollingChartAfterFailedWeek(self):
+        for numpy in (self.numpy, None):
+            lastfm.chart.numpy = numpy
+            user = new_user()
+            expected = new_user()
+            mcl = user.monthly_chart_list
+            start, end = mcl[1].start, mcl[3].end
+            failing = [wc for wc in user.weekly_chart_list if wc.start >= start and wc.end <= end][2]
+            user._api.failing.add(calendar.timegm(failing.start.timetuple()))
+
+            total = expected.get_quaterly_artist_chart(start, end).stats.playcount
+            self.assert_(user.get_quaterly_artist_chart(start, end).stats.playcount < total)
+            self.assertEqual(user._api.failing, set())
+            chart = user.get_quaterly_artist_chart(start, end)
+            self.assertEqual(chart.stats.playcount, total)
+            self.assertEqual(self.chart_counts(chart),
+                             self.chart_counts(expected.get_quaterly_artist_chart(start, end)))
+            # the next window is totalled from this one
+            start, end = mcl[2].start, mcl[4].end
+            self.assertEqual(self.chart_counts(user.get_quaterly_artist_chart(start, end)),
+                             self.chart_counts(expected.get_quaterly_artist_chart(start, end)))
+
+    def testArtistTags(self):
+        api = ChartApi()
+        tags = _ArtistTags.of(api)
+        self.assert_(_ArtistTags.of(api) is tags)
+        self.assert_(_ArtistTags.of(ChartApi()) is not tags)
+        tags.MAX_ARTISTS = 10
+        names = ['artist %d' % i for i in xrange(20)]
+        self.assertEqual(tags.top_tags(names[:2]),
+                         {'artist 0': ['tag of artist 0'], 'artist 1': ['tag of artist 1']})
+        tags.top_tags(names[:10])
+        tags.top_tags(names[:10])
+        self.assertEqual(api.tag_fetches, 10)
+        # the least recently used are dropped
+        tags.top_tags(names[:1])
+        tags.top_tags(names[10:19])
+        self.assertEqual(api.tag_fetches, 19)
+        self.assertEqual(len(tags._tags), 10)
+        tags.top_tags(names[:1])
+        self.assertEqual(api.tag_fetches, 19)
+        tags.top_tags(names[1:2])
+        self.assertEqual(api.tag_fetches, 20)
+        # and the expired are fetched again
+        api.set_cache_timeout(0)
+        tags.top_tags(names[:1])
+        self.assertEqual(api.tag_fetches, 21)
+
+    def testChartRows(self):
+        user = new_user()
+        wc = user.weekly_chart_list[0]
+        chart = user.get_weekly_artist_chart(wc.start, wc.end)
+        artists = chart.artists
+        self.assert_(isinstance(artists, _ChartRows))
+        self.assertEqual(len(artists), ROWS)
+        self.assertEqual(self.built(artists), 0)
+        self.assertEqual(list(artists.keyed_counts()),
+                         [(row[0], row[4]) for row in artists.rows])
+        self.assertEqual(artists.attributes(0)[0], lastfm.Artist)
+        self.assertEqual(artists.attributes(0)[1]['name'], artists.rows[0][0])
+        self.assertEqual(self.built(artists), 0)
+        first = artists[0]
+        self.assert_(artists[0] is first)
+        self.assertEqual(first.name, artists.rows[0][0])
+        self.assertEqual(first.stats.rank, 1)
+        self.assertEqual(self.built(artists), 1)
+        self.assertEqual(artists[-1].name, artists.rows[-1][0])
+
+    def testDiffDoesNotBuildItems(self):
+        user = new_user()
+        wcl = user.weekly_chart_list
+        previous = user.get_weekly_artist_chart(wcl[0].start, wcl[0].end)
+        chart = user.get_weekly_artist_chart(wcl[1].start, wcl[1].end)
+        diff = chart.diff(previous)
+        self.assertEqual(len(diff.entries), ROWS)
+        self.assertEqual(self.built(chart.artists) + self.built(previous.artists), 0)
+        self.assertEqual(diff.entries[0].item.name, chart.artists.rows[0][0])
+        self.assertEqual(self.built(chart.artists), 1)
+
+    def testChartEntriesAsList(self):
+        user = new_user()
+        wc = user.weekly_chart_list[0]
+        artists = user.get_weekly_artist_chart(wc.start, wc.end).artists
+        items = list(artists)
+        self.assertEqual(artists, items)
+        self.assertEqual(items, artists)
+        self.failIf(artists != items)
+        self.assertNotEqual(artists, items[1:])
+        self.assertEqual(artists[2:5], items[2:5])
+        self.assertEqual(artists + items[:2], items + items[:2])
+        self.assertEqual(items[:2] + artists, items[:2] + items)
+        self.assertEqual(artists.index(items[3]), 3)
+        self.assertEqual(artists.count(items[3]), 1)
+        self.assert_(items[3] in artists)
+        other = lastfm.Artist(user._api, name = "no artist",
+                              url = "http://www.last.fm/music/no+artist")
+        self.assertRaises(ValueError, artists.index, other)
+
+    def testStoringDoesNotBuildItems(self):
+        for numpy in (self.numpy, None):
+            lastfm.chart.numpy = numpy
+            user = new_user()
+            dir = tempfile.mkdtemp()
+            try:
+                user._api.set_chart_store(ChartStore(os.path.join(dir, 'charts.db')))
+                mcl = user.monthly_chart_list
+                chart = user.get_quaterly_artist_chart(mcl[1].start, mcl[3].end)
+                self.assert_(user._weekly_partials['artist']._items)
+                for (i, entries, j) in user._weekly_partials['artist']._items:
+                    self.assertEqual(self.built(entries), 0)
+                self.assert_(chart.artists[0].name)
+                user._api._chart_store.close()
+            finally:
+                shutil.rmtree(dir)
+
+    def testDiff(self):
+        user = new_user()
+        wcl = user.weekly_chart_list
+        previous = user.get_weekly_artist_chart(wcl[0].start, wcl[0].end)
+        chart = user.get_weekly_artist_chart(wcl[1].start, wcl[1].end)
+        diff = chart.diff(previous)
+        self.assert_(diff.chart is chart and diff.previous is previous)
+        rows = [('artist %d' % n, c) for (n, c) in weekly_artist_rows(START + WEEK)]
+        previous_rows = [('artist %d' % n, c) for (n, c) in weekly_artist_rows(START)]
+        ranks = dict((name, r + 1) for (r, (name, c)) in enumerate(previous_rows))
+        counts = dict(previous_rows)
+        self.assertEqual([(e.item.name, e.rank, e.count) for e in diff.entries],
+                         [(name, r + 1, c) for (r, (name, c)) in enumerate(rows)])
+        for e in diff.entries:
+            self.assertEqual(e.previous_rank, ranks.get(e.item.name))
+            self.assertEqual(e.previous_count, counts.get(e.item.name, 0))
+            self.assertEqual(e.change, e.count - e.previous_count)
+            if e.previous_rank is None:
+                self.assertEqual(e.movement, None)
+            else:
+                self.assertEqual(e.movement, e.previous_rank - e.rank)
+        names = set(name for (name, c) in rows)
+        self.assertEqual([e.item.name for e in diff.new],
+                         [name for (name, c) in rows if name not in ranks])
+        self.assertEqual([e.item.name for e in diff.moves],
+                         [name for (name, c) in rows if name in ranks])
+        self.assertEqual([(e.item.name, e.rank, e.previous_rank, e.change) for e in diff.dropped],
+                         [(name, None, r + 1, -c) for (r, (name, c)) in enumerate(previous_rows)
+                          if name not in names])
+
+    def testDiffWithItself(self):
+        user = new_user()
+        wc = user.weekly_chart_list[0]
+        chart = user.get_weekly_artist_chart(wc.start, wc.end)
+        diff = chart.diff(chart)
+        self.assertEqual(diff.new, [])
+        self.assertEqual(diff.dropped, [])
+        self.assertEqual([(e.movement, e.change) for e in diff.entries], [(0, 0)] * ROWS)
+
+    def testDiffs(self):
+        user = new_user()
+        charts = [user.get_weekly_artist_chart(wc.start, wc.end)
+                  for wc in user.weekly_chart_list[:4]]
+        expected = [(charts[i + 1], charts[i]) for i in xrange(3)]
+        self.assertEqual([(d.chart, d.previous) for d in Chart.diffs(charts)], expected)
+        self.assertEqual([(d.chart, d.previous) for d in Chart.diffs(reversed(charts))],
+                         list(reversed(expected)))
+        self.assertEqual(list(Chart.diffs(charts[:1])), [])
+
+    def testRollingChartDiff(self):
+        user = new_user()
+        mcl = user.monthly_chart_list
+        previous = user.get_quaterly_artist_chart(mcl[1].start, mcl[3].end)
+        chart = user.get_quaterly_artist_chart(mcl[2].start, mcl[4].end)
+        diff = chart.diff(previous)
+        counts = self.chart_counts(chart)
+        previous_counts = self.chart_counts(previous)
+        self.assertEqual(len(diff.entries), len(chart.artists))
+        self.assertEqual(len(diff.moves) + len(diff.dropped), len(previous.artists))
+        for e in diff.entries + diff.dropped:
+            self.assertEqual(e.count, counts.get(e.item.name, 0))
+            self.assertEqual(e.previous_count, previous_counts.get(e.item.name, 0))
+
+    @unittest.skipIf(lastfm.chart.numpy is None, "NumPy is not installed")
+    def testWeeklyChartMatrix(self):
+        user = new_user()
+        matrix = user.get_weekly_artist_matrix()
+        self.assertEqual(matrix.weeks, list(user.weekly_chart_list))
+        self.assertEqual(matrix.shape, (WEEKS, len(weekly_counts(*range(WEEKS)))))
+        self.assertEqual(sorted(matrix.items), sorted(weekly_counts(*range(WEEKS))))
+        self.assertEqual(int(matrix.indptr[-1]), len(matrix.data))
+        self.assertEqual(len(matrix.indices), len(matrix.data))
+        array = matrix.toarray()
+        for i in xrange(WEEKS):
+            row = dict((k, c) for (k, c) in zip(matrix.items, array[i].tolist()) if c)
+            self.assertEqual(row, weekly_counts(i))
+        key = matrix.items[0]
+        self.assertEqual(matrix.series(key).tolist(),
+                         [weekly_counts(i).get(key, 0) for i in xrange(WEEKS)])
+        self.assertEqual(matrix.series("no artist").tolist(), [0] * WEEKS)
+
+    @unittest.skipIf(lastfm.chart.numpy is None, "NumPy is not installed")
+    def testWeeklyChartMatrixRange(self):
+        user = new_user()
+        wcl = user.weekly_chart_list
+        matrix = user.get_weekly_artist_matrix(wcl[2].start, wcl[5].end)
+        self.assertEqual(matrix.weeks, list(wcl[2:6]))
+        self.assertEqual(matrix.shape, (4, len(weekly_counts(2, 3, 4, 5))))
+        self.assertEqual(dict(zip(matrix.items, matrix.toarray().sum(axis = 0).tolist())),
+                         weekly_counts(2, 3, 4, 5))
+        # the weekly charts are shared with the rolling charts
+        fetches = user._api.fetches
+        user.get_weekly_artist_matrix(wcl[3].start, wcl[4].end)
+        self.assertEqual(user._api.fetches, fetches)
+
+    def testRollingChartLists(self):
+        user = new_user()
+        lists = RollingChart._chart_lists(user)
+        mcl = user.monthly_chart_list
+        # the lists are made once for the weekly chart list
+        self.assert_(RollingChart._chart_lists(user) is lists)
+        self.assert_(user.monthly_chart_list is mcl)
+        self.assert_(QuaterlyChart.get_chart_list(user) is lists['quater'])
+        self.assertEqual(user._api.fetches, 0)
+        # and made again when it changes
+        user._weekly_chart_list = user.weekly_chart_list[:-5]
+        rebuilt = RollingChart._chart_lists(user)
+        self.assert_(rebuilt is not lists)
+        self.assert_(user.monthly_chart_list is rebuilt['month'])
+        self.assert_(len(rebuilt['month']) < len(mcl))
+        self.assertEqual(rebuilt['month'][-1].end, user.weekly_chart_list[-1].end)
+
+    def testChartIndex(self):
+        user = new_user()
+        wcl = user.weekly_chart_list
+        index = _ChartIndex.of(user, 'weekly', wcl)
+        self.assert_(_ChartIndex.of(user, 'weekly', wcl) is index)
+        self.assertEqual(index.position(wcl[4].start, wcl[4].end), 4)
+        self.assertEqual(index.position(wcl[4].start, wcl[5].end), None)
+        self.assertEqual(index.position_from(wcl[7].start), 7)
+        self.assertEqual(index.position_from(wcl[7].start + timedelta(hours = 1)), None)
+        self.assertEqual(index.within(wcl[2].start, wcl[5].end), [2, 3, 4, 5])
+        hour = timedelta(hours = 1)
+        self.assertEqual(index.within(wcl[2].start + hour, wcl[5].end - hour), [3, 4])
+        self.assertEqual(index.overlapping(wcl[2].start, wcl[5].end), [2, 3, 4, 5])
+        self.assertEqual(index.overlapping(wcl[2].start, wcl[2].end), [])
+        self.assertEqual(index.overlapping(wcl[2].start + hour, wcl[5].end - hour), [2, 3, 4, 5])
+        # the index is made again when the list of charts changes
+        user._weekly_chart_list = wcl[:10]
+        rebuilt = _ChartIndex.of(user, 'weekly', user.weekly_chart_list)
+        self.assert_(rebuilt is not index)
+        self.assertEqual(rebuilt.position(wcl[12].start, wcl[12].end), None)
+        self.assertRaises(InvalidParametersError, user.get_weekly_artist_chart,
+                          wcl[12].start, wcl[12].end)
+        self.assertRaises(InvalidParametersError, user.get_weekly_artist_chart,
+                          wcl[2].start, wcl[3].end)
+        self.assertEqual(user._api.fetches, 0)
+        user.get_weekly_artist_chart(wcl[2].start, wcl[2].end)
+        self.assertEqual(user._api.fetches, 1)
+
+    @unittest.skipIf(lastfm.chart.numpy is None, "NumPy is not installed")
+    def testWeeklyChartMatrixOfOneWeek(self):
+        user = new_user()
+        for i in (0, 7, WEEKS - 1):
+            wc = user.weekly_chart_list[i]
+            matrix = user.get_weekly_artist_matrix(wc.start, wc.end)
+            self.assertEqual(matrix.weeks, [wc])
+            self.assertEqual(dict(zip(matrix.items, matrix.toarray()[0].tolist())),
+                             weekly_counts(i))
+
+    @unittest.skipIf(lastfm.chart.numpy is None, "NumPy is not installed")
+    def testWeeklyChartMatrixBoundaries(self):
+        user = new_user()
+        wcl = user.weekly_chart_list
+        # the weeks starting at the start and ending at the end are included
+        self.assertEqual(user.get_weekly_artist_matrix(wcl[0].start, wcl[-1].end).weeks,
+                         list(wcl))
+        self.assertEqual(user.get_weekly_artist_matrix(wcl[3].start, wcl[4].end).weeks,
+                         list(wcl[3:5]))
+        # and those crossing them are not
+        hour = timedelta(hours = 1)
+        self.assertEqual(user.get_weekly_artist_matrix(wcl[3].start + hour, wcl[6].end - hour).weeks,
+                         list(wcl[4:6]))
+        self.assertEqual(user.get_weekly_artist_matrix(wcl[3].start + hour, wcl[4].end).shape,
+                         (1, ROWS))
+
+    def testWeeklyChartMatrixWithoutNumpy(self):
+        lastfm.chart.numpy = None
+        self.assertRaises(ImportError, new_user().get_weekly_artist_matrix)
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestChart)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+import calendar
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import lastfm.chartcube
+from lastfm import ChartCube
+from test_chart import ChartApi, new_user, weekly_counts, WEEKS
+
+class TestChartCube(unittest.TestCase):
+    """ A test class for the ChartCube module, with generated charts. """
+
+    def setUp(self):
+        self.numpy = lastfm.chartcube.numpy
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cube.db')
+        api = ChartApi()
+        self.users = [new_user(api) for i in xrange(3)]
+        self.wcl = self.users[0].weekly_chart_list
+
+    def tearDown(self):
+        lastfm.chartcube.numpy = self.numpy
+        shutil.rmtree(self.dir)
+
+    def each_numpy(self):
+        """set the module to use NumPy (if installed) and not to use it in turns"""
+        for numpy in (self.numpy, None):
+            lastfm.chartcube.numpy = numpy
+            yield numpy
+
+    def testFill(self):
+        cube = ChartCube(self.path)
+        api = self.users[0]._api
+        api.failing.add(calendar.timegm(self.wcl[4].start.timetuple()))
+        self.assertEqual(cube.fill(self.users, 'artist'), 3 * WEEKS - 1)
+        fetches = api.fetches
+        # only the week which failed is fetched again
+        self.assertEqual(cube.fill(self.users, 'artist'), 1)
+        self.assertEqual(cube.fill(self.users, 'artist'), 0)
+        self.assertEqual(api.fetches, fetches + 1)
+        cube.close()
+
+    def testFillRange(self):
+        cube = ChartCube(self.path)
+        self.assertEqual(cube.fill(self.users[:1], 'artist', self.wcl[2].start, self.wcl[5].end), 4)
+        self.assertEqual(cube.fill(self.users[:1], 'artist'), WEEKS - 4)
+        cube.close()
+
+    def testTop(self):
+        cube = ChartCube(self.path)
+        cube.fill(self.users, 'artist')
+        expected = dict((k, 3 * c) for (k, c) in weekly_counts(2, 3, 4, 5).iteritems())
+        for numpy in self.each_numpy():
+            top = cube.top(self.users, 'artist', self.wcl[2].start, self.wcl[5].end, limit = 10)
+            self.assertEqual(len(top), 10)
+            self.assertEqual([c for (k, c) in top], sorted(expected.values(), reverse = True)[:10])
+            for key, count in top:
+                self.assertEqual(count, expected[key])
+            top = cube.top(self.users, 'artist', limit = None)
+            self.assertEqual(dict(top), dict((k, 3 * c) for (k, c) in
+                                             weekly_counts(*range(WEEKS)).iteritems()))
+        cube.close()
+
+    def testContributions(self):
+        cube = ChartCube(self.path)
+        cube.fill(self.users[:1], 'artist')
+        cube.fill(self.users[1:2], 'artist', self.wcl[4].start, self.wcl[4].end)
+        key = weekly_counts(4).keys()[0]
+        for numpy in self.each_numpy():
+            contributions = cube.contributions(self.users, 'artist', key)
+            self.assertEqual([s for (s, c) in contributions], self.users[:2])
+            self.assertEqual([c for (s, c) in contributions],
+                             [weekly_counts(*range(WEEKS))[key], weekly_counts(4)[key]])
+            self.assertEqual(cube.contributions(self.users, 'artist', 'no artist'), [])
+        cube.close()
+
+    def testDeltas(self):
+        cube = ChartCube(self.path)
+        cube.fill(self.users, 'artist')
+        start, end = self.wcl[6].start, self.wcl[7].end
+        current, previous = weekly_counts(6, 7), weekly_counts(4, 5)
+        for numpy in self.each_numpy():
+            deltas = cube.deltas(self.users, 'artist', start, end)
+            self.assertEqual(set(k for (k, c, d) in deltas), set(current) | set(previous))
+            for key, count, change in deltas:
+                self.assertEqual(count, 3 * current.get(key, 0))
+                self.assertEqual(change, 3 * (current.get(key, 0) - previous.get(key, 0)))
+            changes = [d for (k, c, d) in deltas]
+            self.assertEqual(changes, sorted(changes, reverse = True))
+            self.assertEqual(cube.deltas(self.users, 'artist', start, end, limit = 5), deltas[:5])
+        cube.close()
+
+    def testReopen(self):
+        cube = ChartCube(self.path)
+        cube.fill(self.users, 'artist')
+        top = cube.top(self.users, 'artist', limit = 20)
+        cube.close()
+        cube = ChartCube(self.path)
+        self.assertEqual(cube.top(self.users, 'artist', limit = 20), top)
+        self.assertEqual(cube.fill(self.users, 'artist'), 0)
+        cube.close()
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestChartCube)
+
+if __name__ == '__main__':
+    unittest.main()
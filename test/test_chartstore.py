@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+import calendar
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from lastfm import Album, Artist, User
+from lastfm.chart import QuaterlyAlbumChart, QuaterlyArtistChart
+from lastfm.chartstore import ChartStore
+from test_chart import ChartApi, new_user
+
+class TestChartStore(unittest.TestCase):
+    """ A test class for the ChartStore module, with generated charts. """
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'charts.db')
+        self.user = new_user()
+        self.api = self.user._api
+        self.api.set_chart_store(ChartStore(self.path))
+        mcl = self.user.monthly_chart_list
+        self.start, self.end = mcl[1].start, mcl[3].end
+
+    def tearDown(self):
+        self.api._chart_store.close()
+        shutil.rmtree(self.dir)
+
+    def rows(self, chart, chart_type):
+        """the items of the chart with their ranks and counts, as plain values"""
+        rows = []
+        for item in getattr(chart, '%ss' % chart_type):
+            row = (item.__class__, item.name, item.url, item.stats.rank, item.stats.playcount)
+            if chart_type == 'album':
+                row += (item.artist.name,)
+            rows.append(row)
+        return rows
+
+    def reload(self):
+        """the user of the test with a new Api, reading the charts from the store"""
+        self.api._chart_store.close()
+        api = ChartApi()
+        api.set_chart_store(ChartStore(self.path))
+        return User(api, name = self.user.name, bypass_registry = True)
+
+    def testPut(self):
+        chart = self.user.get_quaterly_artist_chart(self.start, self.end)
+        stored = self.api._chart_store.get(self.user, QuaterlyArtistChart, self.start, self.end)
+        self.assertNotEqual(stored, None)
+        self.assertEqual(len(stored), len(chart.artists))
+        self.assertEqual(stored.total, chart.stats.playcount)
+        self.assertEqual(stored.count_attribute, '_playcount')
+        first = chart.artists[0]
+        self.assertEqual(stored.item(0), (Artist, {'name': first.name, 'mbid': '', 'url': first.url},
+                                          first.stats.playcount))
+        self.assertEqual(self.api._chart_store.get(self.user, QuaterlyAlbumChart,
+                                                   self.start, self.end), None)
+
+    def testRoundTrip(self):
+        for chart_type in ('artist', 'album'):
+            chart = getattr(self.user, 'get_quaterly_%s_chart' % chart_type)(self.start, self.end)
+            expected = self.rows(chart, chart_type)
+            total = chart.stats.playcount
+            del chart
+            user = self.reload()
+            loaded = getattr(user, 'get_quaterly_%s_chart' % chart_type)(self.start, self.end)
+            # the weekly charts are not fetched again
+            self.assertEqual(user._api.fetches, 0)
+            self.assertEqual(loaded.stats.playcount, total)
+            self.assertEqual(self.rows(loaded, chart_type), expected)
+            self.user, self.api = user, user._api
+
+    def testAlbumArtists(self):
+        chart = self.user.get_quaterly_album_chart(self.start, self.end)
+        stored = self.api._chart_store.get(self.user, QuaterlyAlbumChart, self.start, self.end)
+        item_class, attributes, count = stored.item(0)
+        self.assertEqual(item_class, Album)
+        self.assertEqual(attributes['artist'], {'name': chart.albums[0].artist.name, 'mbid': ''})
+        self.assertEqual(count, chart.albums[0].stats.playcount)
+
+    def testNotStoredAfterFailure(self):
+        wc = [wc for wc in self.user.weekly_chart_list
+              if wc.start >= self.start and wc.end <= self.end][2]
+        self.api.failing.add(calendar.timegm(wc.start.timetuple()))
+        short = self.user.get_quaterly_artist_chart(self.start, self.end).stats.playcount
+        store = self.api._chart_store
+        self.assertEqual(store.get(self.user, QuaterlyArtistChart, self.start, self.end), None)
+        chart = self.user.get_quaterly_artist_chart(self.start, self.end)
+        self.assert_(chart.stats.playcount > short)
+        stored = store.get(self.user, QuaterlyArtistChart, self.start, self.end)
+        self.assertEqual(stored.total, chart.stats.playcount)
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestChartStore)
+
+if __name__ == '__main__':
+    unittest.main()
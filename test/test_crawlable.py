@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+import random
+import threading
+import time
+import itertools
+import shutil
+import tempfile
+from collections import deque
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from lastfm.mixin import crawlable
+
+NODES = 296
+DEGREE = 4
+
+_random = random.Random(0)
+graph = [_random.sample(xrange(NODES), DEGREE) for i in xrange(NODES)]
+
+@crawlable
+class Node(object):
+    """a node of the synthetic graph, crawled like the related entities"""
+    _api = None
+    def __init__(self, id):
+        self.id = id
+    @staticmethod
+    def _get_all(seed):
+        return (seed, ['id'], lambda api, hsh: [Node(i) for i in graph[hsh['id']]])
+
+@crawlable
+class EndlessNode(Node):
+    """a node with infinitely many related nodes, like the albums crawled
+    through the crawl of their artists"""
+    @staticmethod
+    def _get_all(seed):
+        def related(api, hsh):
+            for i in itertools.count(hsh['id'] * 1000 + 1):
+                yield EndlessNode(i)
+        return (seed, ['id'], related)
+
+def bfs(seed, max_depth = None):
+    """the ids of the nodes reachable from the seed, in the breadth first order"""
+    order = [seed]
+    depths = {seed: 0}
+    queue = deque([seed])
+    while queue:
+        node = queue.popleft()
+        if max_depth is not None and depths[node] >= max_depth:
+            continue
+        for n in graph[node]:
+            if n not in depths:
+                depths[n] = depths[node] + 1
+                order.append(n)
+                queue.append(n)
+    return order
+
+class TestCrawlable(unittest.TestCase):
+    """ A test class for the crawlable mixin. """
+
+    def setUp(self):
+        self.seed = Node(0)
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testCrawlOrder(self):
+        self.assertEqual([n.id for n in Node.get_all(self.seed)], bfs(0))
+
+    def testCrawlSeed(self):
+        crawled = Node.get_all(self.seed)
+        self.assert_(crawled[0] is self.seed)
+
+    def testMaxDepth(self):
+        for depth in (0, 1, 2, 3):
+            self.assertEqual([n.id for n in Node.get_all(self.seed, max_depth = depth)],
+                             bfs(0, depth))
+
+    def testMaxNodes(self):
+        self.assertEqual([n.id for n in Node.get_all(self.seed, max_nodes = 50)],
+                         bfs(0)[:50])
+        self.assertEqual([n.id for n in Node.get_all(self.seed, max_nodes = 1)], [0])
+
+    def testCrawlIsLazy(self):
+        crawled = Node.get_all(self.seed)
+        self.assertEqual(crawled[10].id, bfs(0)[10])
+        self.assertEqual(len(crawled), 11)
+
+    def testConcurrentCrawl(self):
+        for workers in (1, 4, 16):
+            self.assertEqual([n.id for n in Node.get_all(self.seed, workers = workers)], bfs(0))
+            self.assertEqual([n.id for n in Node.get_all(self.seed, max_depth = 2,
+                                                          workers = workers)], bfs(0, 2))
+
+    def testUnorderedConcurrentCrawl(self):
+        crawled = [n.id for n in Node.get_all(self.seed, workers = 4, ordered = False)]
+        self.assertEqual(crawled[0], 0)
+        self.assertEqual(sorted(crawled), sorted(bfs(0)))
+
+    def testConcurrentCrawlError(self):
+        @crawlable
+        class FailingNode(Node):
+            @staticmethod
+            def _get_all(seed):
+                def related(api, hsh):
+                    if hsh['id'] == 2:
+                        raise KeyError(hsh['id'])
+                    return [FailingNode(hsh['id'] + 1)]
+                return (seed, ['id'], related)
+        crawled = FailingNode.get_all(FailingNode(0), workers = 2)
+        self.assertRaises(KeyError, list, crawled)
+
+    def testEndlessConcurrentCrawl(self):
+        threads = threading.active_count()
+        for ordered in (True, False):
+            crawled = EndlessNode.get_all(EndlessNode(0), workers = 4, ordered = ordered)
+            ids = [n.id for n in itertools.islice(crawled, 500)]
+            self.assertEqual(len(set(ids)), 500)
+            if ordered:
+                self.assertEqual(ids, range(500))
+            del crawled
+        for i in xrange(100):
+            if threading.active_count() == threads:
+                break
+            time.sleep(0.01)
+        self.assertEqual(threading.active_count(), threads)
+
+    def testResume(self):
+        for workers in (None, 4):
+            path = os.path.join(self.dir, 'crawl%s.db' % workers)
+            crawled = Node.get_all(self.seed, workers = workers,
+                                   checkpoint = path, checkpoint_interval = 10)
+            first = [n.id for n in itertools.islice(crawled, 100)]
+            del crawled
+            self.assertEqual(first, bfs(0)[:100])
+            resumed = [n.id for n in Node.get_all(self.seed, workers = workers,
+                                                  checkpoint = path, checkpoint_interval = 10)]
+            self.assertEqual(set(first) | set(resumed), set(bfs(0)))
+            # only the nodes returned after the last checkpoint are returned again
+            self.assert_(len(first) + len(resumed) - len(bfs(0)) < 20)
+            self.assertEqual(list(Node.get_all(self.seed, checkpoint = path)), [])
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestCrawlable)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from lastfm.decorators import cached_property
+from lastfm.util import lazylist
+
+class Holder(object):
+    """an object with cached properties, counting the calls of their getters"""
+    def __init__(self):
+        self.calls = 0
+
+    @cached_property
+    def copied(self):
+        self.calls += 1
+        return [1, 2, 3]
+
+    @cached_property(view = True)
+    def viewed(self):
+        """the viewed list"""
+        self.calls += 1
+        return [1, 2, 3]
+
+    @cached_property(view = True)
+    def lazy(self):
+        self.calls += 1
+        @lazylist
+        def gen(lst):
+            for i in xrange(3):
+                yield i
+        return gen()
+
+class TestDecorators(unittest.TestCase):
+    """ A test class for the decorators module. """
+
+    def setUp(self):
+        self.holder = Holder()
+
+    def tearDown(self):
+        pass
+
+    def testCachedProperty(self):
+        value = self.holder.copied
+        self.assertEqual(value, [1, 2, 3])
+        value.append(4)
+        # a copy of the cached value is returned each time
+        self.assertEqual(self.holder.copied, [1, 2, 3])
+        self.assert_(self.holder.copied is not self.holder.copied)
+        self.assertEqual(self.holder.calls, 1)
+
+    def testCachedPropertyView(self):
+        value = self.holder.viewed
+        self.assertEqual(value, (1, 2, 3))
+        self.assert_(isinstance(value, tuple))
+        # the cached tuple itself is returned each time
+        self.assert_(self.holder.viewed is value)
+        self.assert_(self.holder._viewed is value)
+        self.assertEqual(self.holder.calls, 1)
+        self.assertEqual(Holder.viewed.__doc__, "the viewed list")
+
+    def testCachedPropertyViewOfLazyList(self):
+        value = self.holder.lazy
+        self.assert_(self.holder.lazy is value)
+        self.assertEqual(list(value), [0, 1, 2])
+        self.assertEqual(self.holder.calls, 1)
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestDecorators)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from lastfm.util import EdgeList, EdgeTable
+
+class TestEdgeList(unittest.TestCase):
+    """ A test class for the edge lists of the crawls. """
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.edges = [((u'a',), (u'b',), 0.5), ((u'a',), (u'c\xe9',), None),
+                      ((u'b',), (u'a',), 1.0), ((u'x', u'y'), (u'a',), 0.25)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def fill(self, edges):
+        for source, target, weight in self.edges:
+            edges.add(source, target, weight)
+
+    def testEdgeList(self):
+        edges = EdgeList(os.path.join(self.dir, 'edges.tsv'))
+        self.fill(edges)
+        self.assertEqual(list(edges), self.edges)
+        edges.close()
+
+    def testEdgeListAppend(self):
+        path = os.path.join(self.dir, 'edges.tsv')
+        edges = EdgeList(path)
+        self.fill(edges)
+        edges.close()
+        edges = EdgeList(path, 'a')
+        edges.add((u'c',), (u'd',))
+        self.assertEqual(list(edges), self.edges + [((u'c',), (u'd',), None)])
+        edges.close()
+
+    def testEdgeTable(self):
+        edges = EdgeTable(os.path.join(self.dir, 'edges.db'))
+        self.fill(edges)
+        self.assertEqual(list(edges), self.edges)
+        edges.close()
+
+    def testEdgeTableNodes(self):
+        path = os.path.join(self.dir, 'edges.db')
+        edges = EdgeTable(path)
+        self.fill(edges)
+        edges.close()
+        edges = EdgeTable(path)
+        edges.add((u'a',), (u'd',))
+        self.assertEqual(list(edges), self.edges + [((u'a',), (u'd',), None)])
+        self.assertEqual(edges._db.execute("SELECT COUNT(*) FROM nodes").fetchone()[0], 5)
+        edges.close()
+
+    def testEdgeTableBatches(self):
+        path = os.path.join(self.dir, 'edges.db')
+        edges = EdgeTable(path)
+        edges.BATCH_SIZE = 10
+        for i in xrange(25):
+            edges.add((i,), (i + 1,), i)
+        self.assertEqual(len(edges._pending), 5)
+        edges.close()
+        edges = EdgeTable(path)
+        self.assertEqual(list(edges), [((i,), (i + 1,), i) for i in xrange(25)])
+        edges.close()
+
+    def testNestedKeys(self):
+        # the keys of albums and tracks hold the keys of their artists
+        album = (u'an album', (u'Artist', u'an artist'))
+        track = (u'a track', (u'Artist', u'an artist'), (u'x', (u'y', 1)))
+        for edges in (EdgeList(os.path.join(self.dir, 'edges.tsv')),
+                      EdgeTable(os.path.join(self.dir, 'edges.db'))):
+            edges.add(album, track, 0.5)
+            edges.add(track, album)
+            self.assertEqual(list(edges), [(album, track, 0.5), (track, album, None)])
+            self.assertEqual(set(s for (s, t, w) in edges), set([album, track]))
+            edges.close()
+
+    def testCrawlEdges(self):
+        from test_crawlable import Node, bfs, graph
+        edges = EdgeTable(os.path.join(self.dir, 'edges.db'))
+        crawled = [n.id for n in Node.get_all(Node(0), edges = edges)]
+        expected = [((s,), (t,), None) for s in crawled for t in graph[s]]
+        self.assertEqual(list(edges), expected)
+        edges.close()
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestEdgeList)
+
+if __name__ == '__main__':
+    unittest.main()
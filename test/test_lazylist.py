@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+import itertools
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from lastfm.util._lazylist import LazyList, lazylist
+
+@lazylist
+def fibgen(lst):
+    yield 0
+    yield 1
+    for a, b in itertools.izip(lst, lst[1:]):
+        yield a + b
+
+@lazylist
+def primegen(lst):
+    yield 2
+    for candidate in itertools.count(3):
+        if all(candidate % p for p in lst.computed()):
+            yield candidate
+
+class Producer(object):
+    """an iterator over a range which counts the values produced"""
+    def __init__(self, n):
+        self.n = n
+        self.produced = 0
+
+    def __iter__(self):
+        for i in xrange(self.n):
+            self.produced += 1
+            yield i
+
+def slow_producer(n, delay):
+    """a generator over a range which sleeps before each value"""
+    for i in xrange(n):
+        time.sleep(delay)
+        yield i
+
+class TestLazyList(unittest.TestCase):
+    """ A test class for the LazyList module. """
+
+    def setUp(self):
+        self.producer = Producer(200)
+        self.lst = LazyList(self.producer)
+
+    def tearDown(self):
+        pass
+
+    def testIndex(self):
+        self.assertEqual(self.lst[10], 10)
+        self.assertEqual(self.lst[3], 3)
+        self.assertEqual(self.producer.produced, 11)
+
+    def testIndexOutOfRange(self):
+        self.assertRaises(IndexError, lambda: self.lst[200])
+
+    def testNegativeIndex(self):
+        self.assertRaises(ValueError, lambda: self.lst[-1])
+        self.lst.exhaust()
+        self.assertEqual(self.lst[-1], 199)
+        self.assertEqual(self.lst[-200], 0)
+
+    def testNegativeSlice(self):
+        self.assertRaises(ValueError, lambda: self.lst[-5:])
+        self.lst.exhaust()
+        self.assertEqual(list(self.lst[-5:]), range(195, 200))
+        self.assertEqual(list(self.lst[:-195]), range(5))
+        self.assertEqual(list(self.lst[::-50]), [199, 149, 99, 49])
+
+    def testSlice(self):
+        self.assertEqual(list(self.lst[5:10]), range(5, 10))
+        self.assertEqual(list(self.lst[:3]), range(3))
+        self.assertEqual(list(self.lst[150:]), range(150, 200))
+        self.assertEqual(list(self.lst[190:300]), range(190, 200))
+        self.assertEqual(list(self.lst[300:]), [])
+
+    def testSteppedSlice(self):
+        self.assertEqual(list(self.lst[1:100:7]), range(1, 100, 7))
+        self.assertEqual(list(self.lst[::30]), range(0, 200, 30))
+
+    def testSliceOverComputedValues(self):
+        self.lst.exhaust(99)
+        self.assertEqual(list(self.lst[50:150:3]), range(50, 150, 3))
+        self.assertEqual(list(self.lst.computed()), range(150))
+
+    def testIteration(self):
+        self.assertEqual(list(self.lst), range(200))
+        self.assertEqual(list(self.lst), range(200))
+        self.assertEqual(self.producer.produced, 200)
+
+    def testIterationComputesOnlyWhatIsConsumed(self):
+        for x in self.lst:
+            break
+        self.assertEqual(self.producer.produced, 1)
+        for x in self.lst[10:]:
+            break
+        self.assertEqual(self.producer.produced, 11)
+        self.assertEqual(list(itertools.islice(self.lst, 20)), range(20))
+        self.assertEqual(self.producer.produced, 20)
+
+    def testLength(self):
+        self.assertEqual(len(self.lst), 0)
+        self.lst[9]
+        self.assertEqual(len(self.lst), 10)
+        self.lst.exhaust()
+        self.assertEqual(len(self.lst), 200)
+
+    def testConcurrentConsumers(self):
+        results = []
+        def consume():
+            results.append(list(self.lst))
+        threads = [threading.Thread(target = consume) for i in xrange(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [range(200)] * 8)
+        self.assertEqual(self.producer.produced, 200)
+
+    def testConcurrentIndexing(self):
+        slow = LazyList(slow_producer(100, 0.001))
+        results = {}
+        def consume(offset):
+            results[offset] = [slow[i] for i in xrange(offset, 100, 5)]
+        threads = [threading.Thread(target = consume, args = (o,)) for o in xrange(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for o in xrange(5):
+            self.assertEqual(results[o], range(o, 100, 5))
+        self.assertEqual(list(slow.computed()), range(100))
+
+    def testReadAhead(self):
+        lst = LazyList(self.producer).read_ahead(10)
+        self.assertEqual(lst[5], 5)
+        time.sleep(0.1)
+        self.assertEqual(len(lst), 16)
+        self.assertEqual(list(lst), range(200))
+        self.assertEqual(self.producer.produced, 200)
+
+    def testReadAheadNegativeIndex(self):
+        lst = LazyList(self.producer).read_ahead(10)
+        self.assertEqual(lst[5], 5)
+        time.sleep(0.1)
+        self.assertRaises(ValueError, lambda: lst[-1])
+        lst.exhaust()
+        self.assertEqual(lst[-1], 199)
+
+    def testReadAheadOverlapsConsumer(self):
+        def consume(lst):
+            t = time.time()
+            for x in lst:
+                time.sleep(0.02)
+            return time.time() - t
+        sequential = consume(LazyList(slow_producer(20, 0.02)))
+        overlapped = consume(LazyList(slow_producer(20, 0.02)).read_ahead(5))
+        self.assert_(overlapped < sequential * 0.75,
+                     "%.2f s read ahead, %.2f s without" % (overlapped, sequential))
+
+    def testReadAheadStop(self):
+        lst = LazyList(self.producer).read_ahead(10)
+        lst[0]
+        lst.read_ahead(0)
+        time.sleep(0.1)
+        computed = len(lst)
+        self.assertEqual(lst[50], 50)
+        self.assertEqual(len(lst), 51)
+        self.assert_(computed <= 11)
+
+    def testReadAheadError(self):
+        def failing():
+            for i in xrange(3):
+                yield i
+            raise KeyError('failed')
+        lst = LazyList(failing()).read_ahead(5)
+        values = []
+        try:
+            for x in lst:
+                values.append(x)
+        except KeyError, e:
+            self.assertEqual(e.args, ('failed',))
+        else:
+            self.fail("the error of the iterator was not raised")
+        self.assertEqual(values, [0, 1, 2])
+
+    def testRecursiveReadAhead(self):
+        fibs = fibgen().read_ahead(10)
+        self.assertEqual(fibs[100], 354224848179261915075)
+        time.sleep(0.1)
+        self.assertEqual(len(fibs), 111)
+
+    def testStream(self):
+        lst = LazyList(iter(self.producer), source = self.producer.__iter__)
+        self.assertEqual(list(lst.stream()), range(200))
+        self.assertEqual(list(lst.stream()), range(200))
+        self.assertEqual(len(lst), 0)
+        self.assertEqual(lst[10], 10)
+
+    def testStreamWithoutSource(self):
+        self.assertRaises(TypeError, self.lst.stream)
+        self.assertRaises(TypeError, self.lst.chunks, 10)
+
+    def testChunks(self):
+        lst = LazyList(iter(self.producer), source = self.producer.__iter__)
+        chunks = list(lst.chunks(64))
+        self.assertEqual([len(c) for c in chunks], [64, 64, 64, 8])
+        self.assertEqual(sum(chunks, []), range(200))
+        self.assertEqual(list(lst.chunks(200)), [range(200)])
+        self.assertEqual(len(lst), 0)
+
+    def testChunkSize(self):
+        lst = LazyList(iter(self.producer), source = self.producer.__iter__)
+        self.assertRaises(ValueError, lst.chunks, 0)
+        self.assertRaises(ValueError, lst.chunks, -1)
+
+    def testFibonacci(self):
+        fibs = fibgen()
+        expected = [0, 1]
+        while len(expected) < 300:
+            expected.append(expected[-1] + expected[-2])
+        self.assertEqual(fibs[299], expected[299])
+        self.assertEqual(list(fibs[:300]), expected)
+
+    def testPrimes(self):
+        primes = primegen()
+        sieve = range(2000)
+        for i in xrange(2, 45):
+            sieve[i * i::i] = [0] * len(sieve[i * i::i])
+        expected = [n for n in sieve[2:] if n]
+        self.assertEqual(list(itertools.islice(primes, len(expected))), expected)
+        self.assertEqual(primes[len(expected)], 2003)
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestLazyList)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+import gc
+import threading
+import time
+import weakref
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from lastfm import Api, Album, Artist, Event, Location, ObjectCache, Tag, User
+from lastfm.error import InvalidParametersError
+from lastfm.mixin import mixin
+from lastfm.util import Wormhole, cache_key
+
+_artists = [0]
+def new_artists(api, count):
+    """artists with names not used before"""
+    _artists[0] += count
+    return [Artist(api, name = "cache test artist %d" % i)
+            for i in xrange(_artists[0] - count, _artists[0])]
+
+@mixin("cacheable")
+class Racer(object):
+    """an entity which is slow to initialize, noting if the lock of its stripe is held"""
+    def init(self, name):
+        self.name = name
+        self.locked = self._stripe_locked()
+        time.sleep(0.02)
+
+    def _stripe_locked(self):
+        # the lock is held by this thread if it stays locked, as nothing
+        # else holds a stripe lock for long
+        lock = ObjectCache._class_registry('Racer')._stripe(self._cache_key).lock
+        for i in xrange(200):
+            if lock.acquire(False):
+                lock.release()
+                return False
+            time.sleep(0.001)
+        return True
+
+    @staticmethod
+    def _hash_func(name):
+        return name
+
+class TestObjectCache(unittest.TestCase):
+    """ A test class for the ObjectCache module. """
+
+    def setUp(self):
+        self.api = Api('cache-test', no_cache = True)
+        ObjectCache.retain('Artist', 0)
+
+    def tearDown(self):
+        ObjectCache.retain('Artist', 0)
+
+    def stats(self):
+        return ObjectCache().retention_stats['Artist']
+
+    def alive(self, refs):
+        gc.collect()
+        return [r for r in refs if r() is not None]
+
+    def testNotRetained(self):
+        refs = map(weakref.ref, new_artists(self.api, 10))
+        self.assertEqual(self.alive(refs), [])
+
+    def testRetain(self):
+        ObjectCache.retain('Artist', 10)
+        # a share of the size is kept in each stripe of the registry
+        for i in xrange(50):
+            ref = weakref.ref(new_artists(self.api, 1)[0])
+            self.assertEqual(len(self.alive([ref])), 1)
+        stats = self.stats()
+        self.assertEqual(stats['size'], 10)
+        self.assert_(0 < stats['retained'] <= ObjectCache.STRIPE_COUNT)
+
+    def testRetainSize(self):
+        ObjectCache.retain('Artist', 100)
+        refs = map(weakref.ref, new_artists(self.api, 100))
+        alive = len(self.alive(refs))
+        self.assertEqual(alive, self.stats()['retained'])
+        # the size is approximate
+        self.assert_(90 <= alive <= 100 + ObjectCache.STRIPE_COUNT)
+        # the most recently used are kept
+        self.assert_(refs[-1]() is not None)
+
+    def testEvictions(self):
+        ObjectCache.retain('Artist', ObjectCache.STRIPE_COUNT)
+        before = self.stats()
+        refs = map(weakref.ref, new_artists(self.api, 40))
+        after = self.stats()
+        self.assertEqual(after['retained'], len(self.alive(refs)))
+        self.assert_(after['retained'] <= ObjectCache.STRIPE_COUNT)
+        self.assertEqual(after['evictions'] - before['evictions'] + after['retained'], 40)
+
+    def testRetainZero(self):
+        ObjectCache.retain('Artist', 50)
+        refs = map(weakref.ref, new_artists(self.api, 20))
+        ObjectCache.retain('Artist', 0)
+        self.assertEqual(self.stats()['retained'], 0)
+        self.assertEqual(self.alive(refs), [])
+
+    def testHitsAndMisses(self):
+        artist = new_artists(self.api, 1)[0]
+        before = self.stats()
+        self.assert_(Artist(self.api, name = artist.name) is artist)
+        new_artists(self.api, 2)
+        after = self.stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 2)
+
+    def testConstructorRace(self):
+        for n in xrange(5):
+            start = threading.Event()
+            results = []
+            def construct():
+                start.wait()
+                results.append(Racer(name = "racer %d" % n))
+            threads = [threading.Thread(target = construct) for i in xrange(8)]
+            for t in threads:
+                t.start()
+            start.set()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(results), 8)
+            self.assertEqual(len(set(id(r) for r in results)), 1)
+            self.assert_(ObjectCache.get('Racer', "racer %d" % n) is results[0])
+            self.failIf(results[0].locked)
+
+    def testInitWithoutLock(self):
+        racer = Racer(name = "lone racer")
+        self.failIf(racer.locked)
+        self.assert_(Racer(name = "lone racer") is racer)
+
+    def testRegistrationLog(self):
+        registrations = []
+        def log(registration, *args, **kwargs):
+            registrations.append(registration)
+        racer = Racer(name = "logged racer")
+        Wormhole.add_exit('lfm-obcache-register', log)
+        Wormhole.enable()
+        try:
+            Racer(name = "logged racer")
+            other = Racer(name = "another logged racer")
+        finally:
+            Wormhole.disable()
+            Wormhole.remove_exit('lfm-obcache-register', log)
+        # the entities found registered are still reported
+        self.assertEqual(registrations, [(racer, True), (other, False)])
+
+    def testCacheKey(self):
+        artist = Artist(self.api, name = "Key Artist")
+        self.assertEqual(cache_key(artist), ('Artist', 'key artist'))
+        album = Album(self.api, name = "Key Album", artist = artist)
+        self.assertEqual(cache_key(album), ('Album', ("Key Album", ('Artist', 'key artist'))))
+        self.assertEqual(cache_key("plain"), "plain")
+        self.assertEqual(cache_key(1), 1)
+        self.assert_(Artist(self.api, name = "key ARTIST") is artist)
+        self.assertEqual(hash(artist), hash('key artist'))
+
+    def testCollidingHashes(self):
+        # the old keys were the hashes of the ids, which collide for -1 and -2
+        self.assertEqual(hash(-1), hash(-2))
+        first, second = Event(self.api, id = -1), Event(self.api, id = -2)
+        self.assert_(first is not second)
+        self.assert_(Event(self.api, id = -1) is first)
+        # and of strings made from the coordinates, which are the same for these
+        self.assertEqual("latlong%s%s" % (1.5, 23.0), "latlong%s%s" % (1.52, 3.0))
+        first = Location(self.api, latitude = 1.5, longitude = 23.0)
+        second = Location(self.api, latitude = 1.52, longitude = 3.0)
+        self.assert_(first is not second)
+        self.assert_(Location(self.api, latitude = 1.5, longitude = 23.0) is first)
+
+    def testSubjectKeys(self):
+        user = User(self.api, name = "scoped")
+        tag = Tag(self.api, name = "scoped")
+        # the hashes of the subjects are the same, their keys are not
+        self.assertEqual(hash(user), hash(tag))
+        by_user = Artist(self.api, subject = user, name = "scoped artist")
+        by_tag = Artist(self.api, subject = tag, name = "scoped artist")
+        unscoped = Artist(self.api, name = "scoped artist")
+        self.assertEqual(len(set(id(a) for a in (by_user, by_tag, unscoped))), 3)
+        self.assert_(Artist(self.api, subject = user, name = "scoped artist") is by_user)
+        self.assert_(Artist(self.api, subject = User(self.api, name = "scoped"),
+                            name = "scoped artist") is by_user)
+        other_user = User(self.api, name = "other scoped")
+        self.assert_(Artist(self.api, subject = other_user, name = "scoped artist") is not by_user)
+
+    def testLocationHash(self):
+        city = Location(self.api, city = "Tokyo")
+        self.assertEqual(hash(city), hash(('city', "Tokyo")))
+        self.assert_(Location(self.api, city = "Tokyo") is city)
+        place = Location(self.api, latitude = 35.685, longitude = 139.751)
+        self.assertEqual(hash(place), hash(('latlong', 35.685, 139.751)))
+
+    def testRetainParameters(self):
+        self.assertRaises(InvalidParametersError, ObjectCache.retain, 'NoClass', 10)
+        self.assertRaises(InvalidParametersError, ObjectCache.retain, 'Artist', -1)
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestObjectCache)
+
+if __name__ == '__main__':
+    unittest.main()
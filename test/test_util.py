@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from lastfm.util import safe_int, safe_float
+
+class TestUtil(unittest.TestCase):
+    """ A test class for the helper functions of the util package. """
+
+    def testSafeInt(self):
+        self.assertEqual(safe_int('42'), 42)
+        self.assertEqual(safe_int(4.7), 4)
+        self.assertEqual(safe_int('n/a'), 0)
+
+    def testSafeFloat(self):
+        self.assertEqual(safe_float('0.000826'), 0.000826)
+        self.assertEqual(safe_float('35.685'), 35.685)
+        self.assertEqual(safe_float(3), 3.0)
+        self.assert_(isinstance(safe_float(3), float))
+        # so that dividing by it is not a division of integers
+        self.assertEqual(1 / safe_float(4), 0.25)
+        self.assertEqual(safe_float('n/a'), 0)
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestUtil)
+
+if __name__ == '__main__':
+    unittest.main()
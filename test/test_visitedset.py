@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+__author__ = "Abhinav Sarkar <abhinav@abhinavsarkar.net>"
+__version__ = "0.2"
+__license__ = "GNU Lesser General Public License"
+
+import unittest
+import sys, os
+import shutil
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from lastfm.util import BloomFilter, ScalableBloomFilter, SpillSet
+from lastfm.util.visitedset import encode_key
+
+class TestVisitedSet(unittest.TestCase):
+    """ A test class for the visited sets of the crawls. """
+
+    def setUp(self):
+        self.keys = [(u'user%06d' % i,) for i in xrange(5000)]
+        self.others = [(u'other%06d' % i,) for i in xrange(5000)]
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def false_positives(self, visited):
+        return sum(1 for k in self.others if k in visited)
+
+    def testEncodeKey(self):
+        self.assertEqual(encode_key(('a', 1)), encode_key([u'a', 1]))
+        self.assertNotEqual(encode_key(('a', 1)), encode_key(('a', '1')))
+
+    def testBloomFilter(self):
+        visited = BloomFilter(5000, 0.01)
+        for k in self.keys:
+            visited.add(k)
+        self.assertEqual(len(visited), 5000)
+        self.assert_(visited.full)
+        self.assert_(all(k in visited for k in self.keys))
+        self.assert_(self.false_positives(visited) < 5000 * 0.02)
+
+    def testBloomFilterParameters(self):
+        self.assertRaises(ValueError, BloomFilter, 0)
+        self.assertRaises(ValueError, BloomFilter, 100, 0)
+        self.assertRaises(ValueError, BloomFilter, 100, 1)
+
+    def testScalableBloomFilter(self):
+        visited = ScalableBloomFilter(100, 0.01)
+        for k in self.keys:
+            visited.add(k)
+            visited.add(k)
+        # the keys wrongly found in the filter are not added again
+        self.assert_(5000 * 0.98 < len(visited) <= 5000)
+        self.assert_(len(visited._filters) > 1)
+        self.assert_(all(k in visited for k in self.keys))
+        self.assert_(self.false_positives(visited) < 5000 * 0.02)
+
+    def testSpillSet(self):
+        visited = SpillSet(memory_limit = 1000)
+        path = visited.path
+        for k in self.keys:
+            visited.add(k)
+            visited.add(k)
+        self.assertEqual(len(visited), 5000)
+        self.assert_(len(visited._memory) < 1000)
+        self.assert_(all(k in visited for k in self.keys))
+        self.assertEqual(self.false_positives(visited), 0)
+        visited.close()
+        self.failIf(os.path.exists(path))
+
+    def testSpillSetWithoutFilter(self):
+        visited = SpillSet(memory_limit = 100, filter_error_rate = None)
+        for k in self.keys[:500]:
+            visited.add(k)
+        self.assert_(all(k in visited for k in self.keys[:500]))
+        self.assertEqual(self.false_positives(visited), 0)
+        visited.close()
+
+    def testSpillSetReopen(self):
+        path = os.path.join(self.dir, 'visited.db')
+        visited = SpillSet(path, memory_limit = 1000)
+        for k in self.keys:
+            visited.add(k)
+        visited.close()
+        visited = SpillSet(path, memory_limit = 1000)
+        self.assertEqual(len(visited), 5000)
+        self.assert_(all(k in visited for k in self.keys))
+        self.failIf(self.others[0] in visited)
+        visited.close()
+
+    def testCrawlWithVisitedSets(self):
+        from test_crawlable import Node, bfs
+        for visited in (BloomFilter(1000, 0.0001), ScalableBloomFilter(50, 0.0001),
+                        SpillSet(memory_limit = 50)):
+            self.assertEqual([n.id for n in Node.get_all(Node(0), visited = visited)], bfs(0))
+            self.assertEqual(len(visited), len(bfs(0)))
+
+test_suite = unittest.TestLoader().loadTestsFromTestCase(TestVisitedSet)
+
+if __name__ == '__main__':
+    unittest.main()
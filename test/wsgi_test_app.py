@@ -43,11 +43,10 @@ def test_app(environ, start_response):
     except IOError:
         #print "\nintercepted: %s" % url
         #print "key:", key 
-        import wsgi_intercept
-        wsgi_intercept.remove_wsgi_intercept('ws.audioscrobbler.com', 80)
+        # a plain opener reaches the network without removing the intercept,
+        # which the other threads fetching concurrently still rely on
         import urllib2
-        filedata = urllib2.urlopen(url).read()
-        wsgi_intercept.add_wsgi_intercept('ws.audioscrobbler.com', 80, create_wsgi_app)
+        filedata = urllib2.build_opener().open(url).read()
         open(data_file, "w").write(filedata)
     return [filedata]
 